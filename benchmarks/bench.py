@@ -0,0 +1,158 @@
+"""Run the benchmark suite and compare runs.
+
+    python benchmarks/bench.py run                     # all cases -> benchmarks/results/<time>.json
+    python benchmarks/bench.py run -k swamp -o a.json  # only cases whose name contains "swamp"
+    python benchmarks/bench.py compare a.json b.json --threshold 0.1
+
+Every case is timed with ``timeit``: the number of calls per sample is
+picked by ``Timer.autorange`` (at least 0.2 s per sample), then ``--repeat``
+samples are taken. Results are per call. ``compare`` matches cases by name
+and parameter and exits with status 1 if any median got slower by more than
+the threshold, so it can gate CI.
+"""
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from json import dump, load
+from pathlib import Path
+from statistics import median
+from timeit import Timer
+from typing import Optional
+import os
+import platform
+import subprocess
+import sys
+
+from suite import CASES, ROOT
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def machine_metadata() -> dict:
+    versions = {}
+    for module in ["numpy", "scipy", "networkx", "pandas"]:
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def key(name: str, parameter) -> str:
+    return f"{name}[{parameter}]"
+
+
+def run(pattern: Optional[str] = None, repeat: int = 5) -> dict:
+    results = {}
+    for case in CASES:
+        if pattern and pattern not in case.name:
+            continue
+
+        for parameter in case.parameters:
+            try:
+                function = case.setup(parameter)
+            except (ImportError, FileNotFoundError) as error:
+                print(f"skip {key(case.name, parameter)}: {error}", file=sys.stderr)
+                continue
+
+            timer = Timer(function)
+            number, _ = timer.autorange()
+            samples = [total / number for total in timer.repeat(repeat, number)]
+            results[key(case.name, parameter)] = {
+                "name": case.name,
+                "parameter": parameter,
+                "number": number,
+                "samples": samples,
+                "min": min(samples),
+                "median": median(samples),
+            }
+            print(f"{key(case.name, parameter):<50} {format_seconds(median(samples)):>10}")
+
+    return {"metadata": machine_metadata(), "results": results}
+
+
+def compare(base: dict, new: dict, threshold: float = 0.1) -> list[str]:
+    """Print the ratio of medians for every case in both runs; return the regressed ones."""
+    for field in ["machine", "processor", "python", "cpu_count"]:
+        if base["metadata"].get(field) != new["metadata"].get(field):
+            print(f"warning: runs differ in {field}: {base['metadata'].get(field)} vs "
+                  f"{new['metadata'].get(field)}", file=sys.stderr)
+
+    regressions = []
+    for name in sorted(set(base["results"]) & set(new["results"])):
+        before, after = base["results"][name]["median"], new["results"][name]["median"]
+        ratio = after / before
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "SLOWER"
+            regressions.append(name)
+        elif ratio < 1 / (1 + threshold):
+            flag = "faster"
+        print(f"{name:<50} {format_seconds(before):>10} {format_seconds(after):>10} {ratio:>7.2f}x  {flag}")
+
+    for name in sorted(set(base["results"]) ^ set(new["results"])):
+        print(f"{name:<50} only in {'base' if name in base['results'] else 'new'}")
+
+    return regressions
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time the suite and save the results")
+    run_parser.add_argument("-k", dest="pattern", help="only cases whose name contains this")
+    run_parser.add_argument("-o", "--output", type=Path, help="JSON file to write")
+    run_parser.add_argument("--repeat", type=int, default=5)
+
+    compare_parser = commands.add_parser("compare", help="flag slowdowns between two runs")
+    compare_parser.add_argument("base", type=Path)
+    compare_parser.add_argument("new", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="relative slowdown of the median that counts as a regression")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        output = args.output
+        if output is None:
+            RESULTS_DIR.mkdir(exist_ok=True)
+            output = RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        with open(output, "w") as filehandle:
+            dump(run(args.pattern, args.repeat), filehandle, indent=1)
+        print(f"wrote {output}")
+        return 0
+
+    with open(args.base, "r") as filehandle:
+        base = load(filehandle)
+    with open(args.new, "r") as filehandle:
+        new = load(filehandle)
+    return 1 if compare(base, new, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
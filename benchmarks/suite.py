@@ -0,0 +1,132 @@
+"""The benchmark cases: ``(name, parameters, setup)``.
+
+``setup(parameter)`` does everything that shouldn't be timed and returns the
+zero-argument callable that is. Imports happen inside the setups, so listing
+the cases stays cheap and a missing dependency only skips its own cases.
+"""
+from pathlib import Path
+from typing import Callable, NamedTuple
+import random
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+for folder in ["", "sum-swamp", "number-match", "wordzee", "children"]:
+    sys.path.append(str(ROOT / folder))
+
+
+class Case(NamedTuple):
+    name: str
+    parameters: list
+    setup: Callable[[object], Callable[[], object]]
+
+
+SWAMP_DICE = [0.08333333333333333, 0.1388888888888889, 0.125, 0.1111111111111111, 0.09722222222222221,
+              0.08333333333333333, 0.06944444444444445, 0.08333333333333333, 0.06944444444444445,
+              0.05555555555555555, 0.041666666666666664, 0.027777777777777776, 0.013888888888888888]
+
+
+def swamp_game(n: int):
+    """The notebook's 40-square board, repeated to ``n`` squares (its loop only in the first block)."""
+    from sum_swamp import BoardConfig, Dice, Game, Loop, Parities, Shortcuts
+
+    evens, odds, numbered, shortcuts = set(), set(), {}, {}
+    for offset in range(0, n - 1, 40):
+        place = lambda squares: [offset + i for i in squares if offset + i < n - 1]
+        evens.update(place([1, 15]))
+        odds.update(place([8, 32]))
+        numbered.update(zip(place([2, 11, 13, 17, 22, 24, 35]), [2, 3, 6, 1, 5, 3, 3]))
+        shortcuts.update(zip(place([6, 33]), [min(offset + j, n - 1) for j in [12, 37]]))
+
+    config = BoardConfig(n=n, parities=Parities(evens, odds), numbered=numbered,
+                         shortcuts=Shortcuts(shortcuts), loop=Loop(start=21, exit=28, end=30))
+    return Game(config, Dice(SWAMP_DICE))
+
+
+def swamp_matrix(n: int):
+    import numpy as np
+
+    game = swamp_game(n)
+    game.compute_transition_matrix()
+    return np.array(game.transition_matrix)
+
+
+def setup_transition_matrix(n: int):
+    game = swamp_game(n)
+    return game.compute_transition_matrix
+
+
+def setup_expected_tau(n: int):
+    from sum_swamp import expected_tau
+
+    matrix = swamp_matrix(n)
+    return lambda: expected_tau(matrix)
+
+
+def setup_simulate_tau(n_games: int):
+    from sum_swamp import simulate_tau_distribution
+
+    matrix = swamp_matrix(40)
+    random.seed(0)
+    return lambda: simulate_tau_distribution(matrix, n_games)
+
+
+def _probabilities(n: int) -> list:
+    rng = random.Random(0)
+    return [rng.random() for _ in range(n)]
+
+
+def setup_poibin(n: int):
+    from poibin import PoiBin
+
+    probabilities = _probabilities(n)
+    return lambda: PoiBin(probabilities)
+
+
+def setup_poibin_pmf(n: int):
+    from poibin import PoiBin
+
+    distribution = PoiBin(_probabilities(n))
+    successes = list(range(n + 1))
+    return lambda: distribution.pmf(successes)
+
+
+def setup_make_graph(height: int):
+    from graff import make_graph
+
+    return lambda: make_graph(height, 9)
+
+
+def setup_game_analyzer(n_words: int):
+    from json import load
+    from wordzee_search import GameAnalyzer
+
+    with open(ROOT / "wordzee" / "scrabble_words.json", "r") as filehandle:
+        words = load(filehandle)[:n_words]
+
+    letter_vals = dict(zip("abcdefghijklmnopqrstuvwxyz",
+                           [2, 20, 4, 2, 1, 4, 3, 4, 1, 10, 5, 1, 3, 1, 1, 4, 10, 1, 1, 1, 2, 4, 4, 8, 4, 10]))
+
+    def update_all():
+        analyzer = GameAnalyzer(letter_vals)
+        for word in words:
+            analyzer.update(word)
+
+    return update_all
+
+
+def setup_money_simulate(time: int):
+    from money import fractional_interaction, simulate
+
+    return lambda: simulate([5.0] * 1000, time, fractional_interaction)
+
+
+CASES = [
+    Case("sum_swamp.compute_transition_matrix", [40, 160, 640], setup_transition_matrix),
+    Case("sum_swamp.expected_tau", [40, 160, 640], setup_expected_tau),
+    Case("sum_swamp.simulate_tau_distribution", [1_000, 10_000], setup_simulate_tau),
+    Case("poibin.PoiBin", [100, 1_000, 5_000], setup_poibin),
+    Case("poibin.PoiBin.pmf", [100, 1_000, 5_000], setup_poibin_pmf),
+    Case("graff.make_graph", [3, 6, 12, 24], setup_make_graph),
+    Case("wordzee.GameAnalyzer.update", [1_000, 8_000], setup_game_analyzer),
+    Case("money.simulate", [10_000, 100_000], setup_money_simulate),
+]
@@ -46,6 +46,9 @@ References:
     http://dx.doi.org/10.1016/j.csda.2012.10.006.
 """
 
+from contextlib import nullcontext
+import sys
+
 import numpy as np
 
 
@@ -124,9 +127,13 @@ class PoiBin(object):
         chi[0] = 1
         half_number_trials = int(
             self.number_trials / 2 + self.number_trials % 2)
+        # timed only if the host repo's instrument module is loaded and on
+        instrument = sys.modules.get("instrument")
+        timer = instrument.span if getattr(instrument, "ENABLED", False) else None
         # set first half of chis:
-        chi[1:half_number_trials + 1] = self.get_chi(
-            np.arange(1, half_number_trials + 1))
+        with timer("poibin.get_chi", trials=self.number_trials) if timer else nullcontext():
+            chi[1:half_number_trials + 1] = self.get_chi(
+                np.arange(1, half_number_trials + 1))
         # set second half of chis:
         chi[half_number_trials + 1:self.number_trials + 1] = np.conjugate(
             chi[1:self.number_trials - half_number_trials + 1][::-1])
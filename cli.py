@@ -0,0 +1,322 @@
+"""One entry point for the repo's tools.
+
+    python cli.py swamp expected [--board board.json]
+    python cli.py swamp simulate --games 100000 [--seed 0]
+    python cli.py poibin pmf 0.1 0.5 0.9 [--k 0 1]
+    python cli.py wordzee best [--values values.json]
+    python cli.py numbermatch graph --rows 3 [--cols 9] [--clique]
+    python cli.py scrape {walmart,wiki,scrabble} [--offline]
+
+Nothing heavier than the standard library is imported until a subcommand
+needs it, so e.g. ``numbermatch graph`` never loads NumPy or networkx.
+
+For many short invocations, start a daemon once and send it commands; it
+keeps imports, the word list and solved boards warm between requests::
+
+    python cli.py serve &
+    python cli.py -d swamp expected      # answered by the daemon, falls back to running locally
+
+Boards are JSON in the format of ``board_store.canonical_config``. Handlers
+return their output as text, so the daemon can send it back as is.
+"""
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+import json
+import os
+import socket
+import sys
+import tempfile
+
+ROOT = Path(__file__).resolve().parent
+for folder in ["sum-swamp", "number-match", "wordzee", "children", "walmart"]:
+    sys.path.append(str(ROOT / folder))
+
+DEFAULT_SOCKET = os.environ.get(
+    "CLI_SOCKET",
+    os.path.join(tempfile.gettempdir(), f"effective-octo-giggle-{os.getuid()}.sock")
+)
+
+# the notebooks' defaults
+SWAMP_BOARD = {
+    "n": 40,
+    "parities": {"evens": [1, 15], "odds": [8, 32]},
+    "numbered": [[2, 2], [11, 3], [13, 6], [17, 1], [22, 5], [24, 3], [35, 3]],
+    "shortcuts": [[6, 12], [33, 37]],
+    "loops": [{"start": 21, "exit": 28, "end": 30}],
+    # sum or difference of two six-sided dice, each half the time
+    "dice": {"dist": [6 / 72, 10 / 72, 9 / 72, 8 / 72, 7 / 72, 6 / 72, 5 / 72,
+                      6 / 72, 5 / 72, 4 / 72, 3 / 72, 2 / 72, 1 / 72], "p": 0.5},
+}
+# point // round from the wordzee notebook's letter_data
+WORDZEE_VALUES = {
+    "a": 1, "b": 4, "c": 4, "d": 2, "e": 1, "f": 4, "g": 3, "h": 4, "i": 1, "j": 10, "k": 5, "l": 1, "m": 3,
+    "n": 1, "o": 1, "p": 4, "q": 10, "r": 1, "s": 1, "t": 1, "u": 2, "v": 4, "w": 4, "x": 8, "y": 4, "z": 10,
+}
+
+# what the daemon keeps between requests
+_warm: dict = {}
+
+
+def warm(key, factory: Callable):
+    if key not in _warm:
+        _warm[key] = factory()
+    return _warm[key]
+
+
+def _load_json(value: Optional[str], default):
+    """A JSON file, inline JSON, or ``default``."""
+    if value is None:
+        return default
+    if os.path.exists(value):
+        with open(value, "r") as filehandle:
+            return json.load(filehandle)
+    return json.loads(value)
+
+
+@contextmanager
+def _in_directory(directory: Path) -> Iterator[None]:
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+# ------------------------------------------------------------------------------
+# Handlers: argparse namespace -> output text
+# ------------------------------------------------------------------------------
+
+def _swamp_board(board: Optional[str]):
+    from board_store import config_from_canonical, config_hash
+
+    config, dice = config_from_canonical(_load_json(board, SWAMP_BOARD))
+    return config_hash(config, dice), config, dice
+
+
+def _swamp_matrix(board: Optional[str]):
+    import numpy as np
+    from sum_swamp import Game
+
+    key, config, dice = _swamp_board(board)
+
+    def compute():
+        game = Game(config, dice)
+        game.compute_transition_matrix()
+        return np.array(game.transition_matrix)
+
+    return key, warm(("swamp", key), compute)
+
+
+def swamp_expected(args) -> str:
+    from sum_swamp import expected_tau
+
+    key, matrix = _swamp_matrix(args.board)
+    return f"{warm(('swamp-expected', key), lambda: expected_tau(matrix)):.6f}"
+
+
+def swamp_simulate(args) -> str:
+    import random
+    from sum_swamp import simulate_tau_distribution
+
+    _, matrix = _swamp_matrix(args.board)
+    if args.seed is not None:
+        random.seed(args.seed)
+    distribution = simulate_tau_distribution(matrix, args.games)
+    return json.dumps(dict((int(k), distribution[k]) for k in sorted(distribution)))
+
+
+def poibin_pmf(args) -> str:
+    from poibin import PoiBin
+
+    distribution = PoiBin(args.probabilities)
+    k = args.k if args.k is not None else list(range(len(args.probabilities) + 1))
+    return json.dumps(distribution.pmf(k).tolist())
+
+
+def wordzee_best(args) -> str:
+    def load_matrix():
+        from word_matrix import WordMatrix
+        with open(ROOT / "wordzee" / "scrabble_words.json", "r") as filehandle:
+            return WordMatrix(json.load(filehandle))
+
+    matrix = warm("wordzee", load_matrix)
+    rows = matrix.best_words([_load_json(args.values, WORDZEE_VALUES)])[0]
+
+    lines = []
+    for analyzer in rows:
+        lines.append(f"Row {analyzer.row}:")
+        lines.append(f"\tbest: {analyzer.best.points} {', '.join(w.word for w in analyzer.best.words)}")
+        if analyzer.does_it_matter():
+            lines.append(f"\tfull: {analyzer.best_full.points} {', '.join(w.word for w in analyzer.best_full.words)}")
+    return "\n".join(lines)
+
+
+def numbermatch_graph(args) -> str:
+    import graff
+
+    if not args.clique:
+        return "\n".join(graff.make_adjacency_list(args.rows, args.cols))
+
+    from cliques import max_clique
+    clique = max_clique(graff.make_graph(args.rows, args.cols))
+    return " ".join(sorted(clique.nodes, key=int))
+
+
+def scrape(args) -> str:
+    if args.source == "scrabble":
+        import scrabble_scrapper
+        with _in_directory(ROOT / "wordzee"):
+            scrabble_scrapper.main(offline=args.offline)
+        return f"wrote {ROOT / 'wordzee' / scrabble_scrapper.DESTINATION}"
+
+    import http_cache
+
+    if args.source == "wiki":
+        import wiki_scrapper as scrapper
+        destination = scrapper.SAVE_LOCATION
+    else:
+        import walmart_scrapper as scrapper
+        destination = scrapper.SAVE_NAME
+
+    # only for this command: a daemon keeps serving later ones online
+    offline = http_cache.configured(offline=True) if args.offline else nullcontext()
+    with offline, _in_directory(ROOT / "walmart"):
+        scrapper.main()
+    return f"wrote {ROOT / 'walmart' / destination}"
+
+
+# ------------------------------------------------------------------------------
+# Argument parsing and dispatch
+# ------------------------------------------------------------------------------
+
+def make_parser():
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(prog="cli.py", description="effective-octo-giggle tools")
+    parser.add_argument("-d", "--daemon", action="store_true", help="send the command to a running daemon")
+    tools = parser.add_subparsers(dest="tool", required=True)
+
+    swamp = tools.add_parser("swamp").add_subparsers(dest="action", required=True)
+    expected = swamp.add_parser("expected", help="expected number of turns")
+    expected.add_argument("--board", help="board JSON (file or inline)")
+    expected.set_defaults(handler=swamp_expected)
+    simulate = swamp.add_parser("simulate", help="simulated distribution of the number of turns")
+    simulate.add_argument("--board", help="board JSON (file or inline)")
+    simulate.add_argument("--games", type=int, default=100_000)
+    simulate.add_argument("--seed", type=int)
+    simulate.set_defaults(handler=swamp_simulate)
+
+    poibin = tools.add_parser("poibin").add_subparsers(dest="action", required=True)
+    pmf = poibin.add_parser("pmf", help="Poisson binomial probability mass function")
+    pmf.add_argument("probabilities", type=float, nargs="+")
+    pmf.add_argument("--k", type=int, nargs="+", help="numbers of successes (default: all)")
+    pmf.set_defaults(handler=poibin_pmf)
+
+    wordzee = tools.add_parser("wordzee").add_subparsers(dest="action", required=True)
+    best = wordzee.add_parser("best", help="best words for every row")
+    best.add_argument("--values", help="letter values JSON (file or inline)")
+    best.set_defaults(handler=wordzee_best)
+
+    numbermatch = tools.add_parser("numbermatch").add_subparsers(dest="action", required=True)
+    graph = numbermatch.add_parser("graph", help="adjacency list of the board graph")
+    graph.add_argument("--rows", type=int, default=3)
+    graph.add_argument("--cols", type=int, default=9)
+    graph.add_argument("--clique", action="store_true", help="print a maximum clique instead")
+    graph.set_defaults(handler=numbermatch_graph)
+
+    scraper = tools.add_parser("scrape", help="run a scraper")
+    scraper.add_argument("source", choices=["walmart", "wiki", "scrabble"])
+    scraper.add_argument("--offline", action="store_true", help="only answer from the HTTP cache")
+    scraper.set_defaults(handler=scrape)
+
+    serve = tools.add_parser("serve", help="keep a daemon answering commands on a Unix socket")
+    serve.add_argument("--socket", default=DEFAULT_SOCKET)
+
+    return parser
+
+
+def run(argv: list[str]) -> tuple[int, str, str]:
+    """Run one command in this process: ``(exit code, stdout, stderr)``."""
+    from contextlib import redirect_stderr
+    from io import StringIO
+    import traceback
+
+    errors = StringIO()
+    with redirect_stderr(errors):
+        try:
+            args = make_parser().parse_args(argv)
+            if args.tool == "serve":
+                raise SystemExit("serve can't be sent to a daemon")
+            return 0, args.handler(args), errors.getvalue()
+        except SystemExit as error:  # argparse errors and --help
+            code = error.code if isinstance(error.code, int) else 1
+            if isinstance(error.code, str):
+                errors.write(error.code + "\n")
+            return code, "", errors.getvalue()
+        except Exception:
+            traceback.print_exc()
+            return 1, "", errors.getvalue()
+
+
+def serve(path: str) -> None:
+    from signal import SIGTERM, signal
+    from socketserver import StreamRequestHandler, UnixStreamServer
+
+    class Handler(StreamRequestHandler):
+        def handle(self) -> None:
+            for line in self.rfile:
+                code, out, err = run(json.loads(line)["argv"])
+                reply = {"code": code, "stdout": out, "stderr": err}
+                self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+    if os.path.exists(path):
+        os.remove(path)
+    # exit through the finally below, which removes the socket
+    signal(SIGTERM, lambda *_: sys.exit(0))
+    with UnixStreamServer(path, Handler) as server:
+        print(f"listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def send(argv: list[str], path: str = DEFAULT_SOCKET) -> tuple[int, str, str]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(json.dumps({"argv": argv}).encode("utf-8") + b"\n")
+        with connection.makefile("rb") as replies:
+            reply = json.loads(replies.readline())
+    return reply["code"], reply["stdout"], reply["stderr"]
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv[:1] in (["-d"], ["--daemon"]):
+        try:
+            code, out, err = send(argv[1:])
+        except (ConnectionRefusedError, FileNotFoundError):
+            print(f"no daemon on {DEFAULT_SOCKET}, running locally", file=sys.stderr)
+            code, out, err = run(argv[1:])
+    elif argv[:1] == ["serve"]:
+        args = make_parser().parse_args(argv)
+        serve(args.socket)
+        return 0
+    else:
+        code, out, err = run(argv)
+
+    if err:
+        sys.stderr.write(err)
+    if out:
+        print(out)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
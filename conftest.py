@@ -0,0 +1,7 @@
+"""Puts the repo root on the path for every test, so the folders' modules find
+the shared root modules (``instrument``, ``http_cache``) the way ``cli.py``
+and ``benchmarks/`` do."""
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
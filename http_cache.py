@@ -0,0 +1,284 @@
+"""On-disk HTTP response cache shared by the scrapers.
+
+Bodies are stored content-addressed under ``objects/`` (by SHA-256, so
+identical pages are kept once) and every URL gets a small metadata file with
+the status code, validators and timestamps. A cached response is served
+without touching the network while it is younger than ``ttl``; after that it
+is revalidated with ``If-None-Match`` / ``If-Modified-Since``. Only 2xx
+responses are stored. Once the cache grows past ``max_bytes`` the least
+recently used entries are evicted.
+
+Offline mode (``HttpCache(offline=True)`` or ``HTTP_CACHE_OFFLINE=1``) only
+ever answers from the cache and raises ``CacheMiss`` for anything else, which
+makes re-running an analysis reproducible without network access.
+
+    >>> from http_cache import get
+    >>> page = get("https://example.com")
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from hashlib import sha1, sha256
+from json import dump, load
+from os import environ, makedirs, path, remove, replace, scandir, utime
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from typing import Iterator, Optional
+import time
+
+import requests
+
+import instrument
+
+
+DEFAULT_DIR = environ.get(
+    "HTTP_CACHE_DIR",
+    path.join(path.dirname(path.abspath(__file__)), ".http_cache")
+)
+DEFAULT_TTL = 30 * 24 * 60 * 60  # seconds
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+class CacheMiss(LookupError):
+    pass
+
+
+def is_cacheable(status_code: int) -> bool:
+    """Only successful responses are kept; errors such as 429 or 503 are retried next time."""
+    return 200 <= status_code < 300
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    content: bytes
+    headers: dict = field(default_factory=dict)
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} for {self.url}")
+
+
+class HttpCache:
+    def __init__(self, directory: str = DEFAULT_DIR, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES, offline: Optional[bool] = None) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = environ.get("HTTP_CACHE_OFFLINE", "") not in ("", "0") if offline is None else offline
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        self._lock = Lock()
+        self._size: Optional[int] = None
+
+        makedirs(path.join(directory, "meta"), exist_ok=True)
+        makedirs(path.join(directory, "objects"), exist_ok=True)
+
+    def get(self, url: str, timeout: Optional[float] = 30, **kwargs) -> CachedResponse:
+        meta = self._read_meta(url)
+        if meta is not None and not is_cacheable(meta["status"]):
+            # written by an older version that stored errors too
+            meta = None
+
+        if self.offline:
+            response = None if meta is None else self._hit(url, meta)
+            if response is None:
+                raise CacheMiss(url)
+            return response
+
+        if meta is not None and time.time() - meta["fetched"] < self.ttl:
+            response = self._hit(url, meta)
+            if response is not None:
+                return response
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        validators = {}
+        if meta is not None and meta.get("etag"):
+            validators["If-None-Match"] = meta["etag"]
+        if meta is not None and meta.get("last_modified"):
+            validators["If-Modified-Since"] = meta["last_modified"]
+
+        response = self._request(url, {**headers, **validators}, timeout, **kwargs)
+        if response.status_code == 304 and validators:
+            meta["fetched"] = time.time()
+            self._write_meta(url, meta)
+            cached = self._hit(url, meta, count=False)
+            if cached is not None:
+                with self._lock:
+                    self.revalidated += 1
+                instrument.count("http_cache.revalidated")
+                return cached
+            # evicted since we read the metadata
+            response = self._request(url, headers, timeout, **kwargs)
+
+        with self._lock:
+            self.misses += 1
+        instrument.count("http_cache.misses")
+        if is_cacheable(response.status_code):
+            self._store(url, response)
+        return CachedResponse(url, response.status_code, response.content, dict(response.headers))
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
+
+    def _request(self, url: str, headers: dict, timeout: Optional[float], **kwargs) -> requests.Response:
+        with instrument.span("http_cache.request", url=url):
+            return requests.get(url, headers=headers, timeout=timeout, **kwargs)
+
+    def _hit(self, url: str, meta: dict, count: bool = True) -> Optional[CachedResponse]:
+        """The cached response, or None if it was evicted since ``meta`` was read."""
+        # under the lock, so evict() can't delete the files halfway through
+        with self._lock:
+            try:
+                with open(self._object_path(meta["digest"]), "rb") as filehandle:
+                    content = filehandle.read()
+                # the metadata file's mtime doubles as the LRU clock
+                utime(self._meta_path(url))
+            except FileNotFoundError:
+                return None
+            if count:
+                self.hits += 1
+
+        if count:
+            instrument.count("http_cache.hits")
+        headers = {"ETag": meta.get("etag"), "Last-Modified": meta.get("last_modified")}
+        return CachedResponse(url, meta["status"], content, headers, from_cache=True)
+
+    def _store(self, url: str, response: requests.Response) -> None:
+        digest = sha256(response.content).hexdigest()
+        object_path = self._object_path(digest)
+        is_new = not path.exists(object_path)
+        if is_new:
+            makedirs(path.dirname(object_path), exist_ok=True)
+            self._atomic_write(object_path, response.content)
+
+        self._write_meta(url, {
+            "url": url,
+            "status": response.status_code,
+            "digest": digest,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched": time.time(),
+        })
+
+        # only after the metadata exists, so eviction can't treat the body as orphaned
+        if is_new:
+            self._grow(len(response.content))
+
+    def _grow(self, n_bytes: int) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(entry.stat().st_size for entry in self._objects())
+            else:
+                self._size += n_bytes
+            needs_eviction = self._size > self.max_bytes
+
+        if needs_eviction:
+            self.evict()
+
+    def evict(self, target_bytes: Optional[int] = None) -> None:
+        """Drop least recently used URLs until the stored bodies fit in ``target_bytes``."""
+        target_bytes = int(0.9 * self.max_bytes) if target_bytes is None else target_bytes
+
+        with self._lock:
+            metas = []
+            for entry in scandir(path.join(self.directory, "meta")):
+                if not entry.name.endswith(".json"):
+                    continue
+                with open(entry.path, "r") as filehandle:
+                    metas.append((entry.stat().st_mtime, entry.path, load(filehandle)["digest"]))
+            metas.sort()
+
+            sizes = dict((entry.name, entry.stat().st_size) for entry in self._objects())
+            references = {}
+            for _, _, digest in metas:
+                references[digest] = references.get(digest, 0) + 1
+
+            for digest in list(sizes):
+                if digest not in references:
+                    remove(self._object_path(digest))
+                    del sizes[digest]
+
+            size = sum(sizes.values())
+            for _, meta_path, digest in metas:
+                if size <= target_bytes:
+                    break
+                remove(meta_path)
+                references[digest] -= 1
+                if references[digest] == 0 and digest in sizes:
+                    remove(self._object_path(digest))
+                    size -= sizes[digest]
+            self._size = size
+
+    def _objects(self):
+        for shard in scandir(path.join(self.directory, "objects")):
+            if shard.is_dir():
+                yield from scandir(shard.path)
+
+    def _meta_path(self, url: str) -> str:
+        return path.join(self.directory, "meta", sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _object_path(self, digest: str) -> str:
+        return path.join(self.directory, "objects", digest[:2], digest)
+
+    def _read_meta(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(url), "r") as filehandle:
+                return load(filehandle)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_meta(self, url: str, meta: dict) -> None:
+        with NamedTemporaryFile("w", dir=path.join(self.directory, "meta"), delete=False) as filehandle:
+            dump(meta, filehandle)
+        replace(filehandle.name, self._meta_path(url))
+
+    def _atomic_write(self, destination: str, content: bytes) -> None:
+        with NamedTemporaryFile("wb", dir=path.dirname(destination), delete=False) as filehandle:
+            filehandle.write(content)
+        replace(filehandle.name, destination)
+
+
+_default_cache: Optional[HttpCache] = None
+
+
+def default_cache() -> HttpCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = HttpCache()
+    return _default_cache
+
+
+def configure(**kwargs) -> HttpCache:
+    """Replace the shared cache, e.g. ``configure(offline=True)``."""
+    global _default_cache
+    _default_cache = HttpCache(**kwargs)
+    return _default_cache
+
+
+@contextmanager
+def configured(**kwargs) -> Iterator[HttpCache]:
+    """Like ``configure``, but only for the block; the previous shared cache comes back after it."""
+    global _default_cache
+    previous = _default_cache
+    _default_cache = HttpCache(**kwargs)
+    try:
+        yield _default_cache
+    finally:
+        _default_cache = previous
+
+
+def get(url: str, **kwargs) -> CachedResponse:
+    return default_cache().get(url, **kwargs)
@@ -0,0 +1,161 @@
+"""Opt-in timing spans, counters and profiling for the analysis modules.
+
+Nothing is recorded unless instrumentation is switched on, either for the
+whole process (``INSTRUMENT=1`` in the environment, or ``enable()``) or for
+a block::
+
+    >>> import instrument
+    >>> with instrument.recording() as recorder:
+    ...     expected_tau(matrix)
+    >>> recorder.summary()["values"]["sum_swamp.expected_tau.iterations"]
+    >>> recorder.export_chrome_trace("trace.json")  # open in chrome://tracing or Perfetto
+
+Hot paths guard their hooks with ``if instrument.ENABLED:``, so when it is
+off a hook costs one attribute lookup. ``span`` returns a shared no-op
+context manager when disabled, for code that isn't hot enough to need the
+guard.
+
+``profile`` runs cProfile around a block, independently of the above::
+
+    >>> with instrument.profile("sweep.prof"):
+    ...     run_sweep()
+"""
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from cProfile import Profile
+from json import dump
+from os import environ, getpid
+from pstats import Stats
+from threading import Lock, get_ident
+from typing import Iterator, Optional
+import sys
+import time
+
+
+ENABLED = environ.get("INSTRUMENT", "") not in ("", "0")
+
+_NOTHING = nullcontext()
+
+
+class Recorder:
+    """Spans as Chrome-trace "complete" events, plus counters and recorded values."""
+
+    def __init__(self) -> None:
+        self.events: list[dict] = []
+        self.counters: dict[str, float] = defaultdict(float)
+        self.values: dict[str, list[float]] = defaultdict(list)
+        self.start = time.perf_counter()
+        self._lock = Lock()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self.start) * 1e6
+
+    @contextmanager
+    def span(self, name: str, **args) -> Iterator[None]:
+        begin = self._now_us()
+        try:
+            yield
+        finally:
+            event = {"name": name, "ph": "X", "ts": begin, "dur": self._now_us() - begin,
+                     "pid": getpid(), "tid": get_ident(), "args": args}
+            with self._lock:
+                self.events.append(event)
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def record(self, name: str, value: float) -> None:
+        with self._lock:
+            self.values[name].append(value)
+
+    def summary(self) -> dict:
+        spans = defaultdict(list)
+        for event in self.events:
+            spans[event["name"]].append(event["dur"] / 1e6)
+
+        describe = lambda xs: {"n": len(xs), "total": sum(xs), "mean": sum(xs) / len(xs), "max": max(xs)}
+        return {
+            "spans": dict((name, describe(xs)) for name, xs in spans.items()),
+            "counters": dict(self.counters),
+            "values": dict((name, describe(xs)) for name, xs in self.values.items() if xs),
+        }
+
+    def export_json(self, destination: str) -> None:
+        with open(destination, "w") as filehandle:
+            dump(self.summary(), filehandle, indent=1)
+
+    def export_chrome_trace(self, destination: str) -> None:
+        # counters go in as one final counter event each
+        end = self._now_us()
+        counters = [
+            {"name": name, "ph": "C", "ts": end, "pid": getpid(), "tid": 0, "args": {"value": value}}
+            for name, value in self.counters.items()
+        ]
+        with open(destination, "w") as filehandle:
+            dump({"traceEvents": self.events + counters, "displayTimeUnit": "ms"}, filehandle)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.events.clear()
+            self.counters.clear()
+            self.values.clear()
+
+
+recorder = Recorder()
+
+
+def enable() -> Recorder:
+    global ENABLED
+    ENABLED = True
+    return recorder
+
+
+def disable() -> None:
+    global ENABLED
+    ENABLED = False
+
+
+@contextmanager
+def recording(clear: bool = True) -> Iterator[Recorder]:
+    """Record for the duration of the block (starting from an empty recorder by default)."""
+    global ENABLED
+    previous = ENABLED
+    if clear:
+        recorder.clear()
+    ENABLED = True
+    try:
+        yield recorder
+    finally:
+        ENABLED = previous
+
+
+def span(name: str, **args):
+    if not ENABLED:
+        return _NOTHING
+    return recorder.span(name, **args)
+
+
+def count(name: str, value: float = 1) -> None:
+    if ENABLED:
+        recorder.count(name, value)
+
+
+def record(name: str, value: float) -> None:
+    if ENABLED:
+        recorder.record(name, value)
+
+
+@contextmanager
+def profile(destination: Optional[str] = None, sort: str = "cumulative", limit: int = 30) -> Iterator[Profile]:
+    """cProfile the block; save the stats to ``destination`` or print the top ``limit`` entries."""
+    profiler = Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if destination is not None:
+            profiler.dump_stats(destination)
+        else:
+            Stats(profiler, stream=sys.stderr).sort_stats(sort).print_stats(limit)
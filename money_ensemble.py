@@ -0,0 +1,160 @@
+"""Ensembles of money simulations over parameter grids, on every core.
+
+Each ``Config`` (kernel with its parameters, population size, number of
+interactions, starting wealth) is run ``replicas`` times. Jobs go to a
+process pool; every job gets its own ``SeedSequence`` child, so replicas are
+independent and the whole ensemble is reproducible from one seed. The
+populations live in shared memory, one block per config: a worker simulates
+directly into its replica's row and only timings travel back through pickle.
+
+Per replica the population quantiles at ``levels`` are taken, and the
+quantile bands across replicas (``band_levels``) are written to one ``.npz``::
+
+    >>> configs = grid([FractionalInteraction(f) for f in (0.05, 0.1, 0.2)], sizes=[1000, 10 ** 6])
+    >>> results = run_ensemble(configs, replicas=32, seed=0, save_to="fractional.npz")
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import product
+from multiprocessing import shared_memory
+from os import cpu_count
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from money import run
+
+
+DEFAULT_LEVELS = np.linspace(0, 1, 21)
+DEFAULT_BAND_LEVELS = np.array([0.05, 0.5, 0.95])
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3  # shared memory held at once
+
+
+@dataclass(frozen=True)
+class Config:
+    kernel: Callable
+    n: int = 1000
+    time: Optional[int] = None  # defaults to 10_000 interactions per individual
+    x0: float = 5.0
+
+    @property
+    def interactions(self) -> int:
+        return 10_000 * self.n if self.time is None else self.time
+
+    @property
+    def label(self) -> str:
+        return f"{self.kernel!r} n={self.n} t={self.interactions} x0={self.x0}"
+
+
+def grid(kernels: Iterable[Callable], sizes: Iterable[int] = (1000,),
+         time_per_individual: int = 10_000, x0: float = 5.0) -> list[Config]:
+    return [
+        Config(kernel, n, time_per_individual * n, x0)
+        for kernel, n in product(kernels, sizes)
+    ]
+
+
+def _simulate_replica(shm_name: str, n_replicas: int, n: int, replica: int,
+                      config: Config, seed: np.random.SeedSequence) -> tuple[int, float]:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    populations = np.ndarray((n_replicas, n), dtype=np.float64, buffer=shm.buf)
+    try:
+        result = run(config.x0, config.interactions, config.kernel, seed=seed, out=populations[replica])
+        return result.interactions, result.seconds
+    finally:
+        # views into the buffer must be gone before it can be closed
+        del populations
+        shm.close()
+
+
+def gini(populations: np.ndarray) -> np.ndarray:
+    """Gini coefficient of every row."""
+    ordered = np.sort(populations, axis=1)
+    n = ordered.shape[1]
+    ranks = 2 * np.arange(1, n + 1) - n - 1
+    return ordered @ ranks / (n * ordered.sum(axis=1))
+
+
+def run_ensemble(configs: list[Config], replicas: int = 16, seed: Optional[int] = None,
+                 levels: np.ndarray = DEFAULT_LEVELS, band_levels: np.ndarray = DEFAULT_BAND_LEVELS,
+                 workers: Optional[int] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 save_to: Optional[str] = None) -> dict[str, np.ndarray]:
+    """Run every config ``replicas`` times and summarize the final populations.
+
+    Returns (and optionally saves) arrays indexed by config:
+    ``bands[c, b, q]`` is the ``band_levels[b]`` quantile across replicas of
+    the ``levels[q]`` wealth quantile; ``gini``, ``interactions`` and
+    ``seconds`` are per ``[c, replica]``.
+    """
+    workers = workers or cpu_count()
+    seeds = np.random.SeedSequence(seed).spawn(len(configs))
+
+    bands = np.empty((len(configs), len(band_levels), len(levels)))
+    ginis = np.empty((len(configs), replicas))
+    interactions = np.empty((len(configs), replicas), dtype=np.int64)
+    seconds = np.empty((len(configs), replicas))
+
+    blocks: dict[int, shared_memory.SharedMemory] = {}
+    remaining: dict[int, int] = {}
+    pending = {}
+
+    def finish(c: int) -> None:
+        shm = blocks.pop(c)
+        populations = np.ndarray((replicas, configs[c].n), dtype=np.float64, buffer=shm.buf)
+        per_replica = np.quantile(populations, levels, axis=1).T
+        bands[c] = np.quantile(per_replica, band_levels, axis=0)
+        ginis[c] = gini(populations)
+        del populations
+        shm.close()
+        shm.unlink()
+
+    with ProcessPoolExecutor(workers) as executor:
+        try:
+            queue = list(range(len(configs)))
+            while queue or pending:
+                # start configs while their populations fit in the shared-memory budget
+                while queue:
+                    c = queue[0]
+                    n_bytes = replicas * configs[c].n * 8
+                    in_use = sum(block.size for block in blocks.values())
+                    if blocks and in_use + n_bytes > max_bytes:
+                        break
+                    queue.pop(0)
+
+                    blocks[c] = shared_memory.SharedMemory(create=True, size=n_bytes)
+                    remaining[c] = replicas
+                    for replica, replica_seed in enumerate(seeds[c].spawn(replicas)):
+                        future = executor.submit(
+                            _simulate_replica, blocks[c].name, replicas, configs[c].n,
+                            replica, configs[c], replica_seed
+                        )
+                        pending[future] = (c, replica)
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    c, replica = pending.pop(future)
+                    interactions[c, replica], seconds[c, replica] = future.result()
+                    remaining[c] -= 1
+                    if remaining[c] == 0:
+                        finish(c)
+        finally:
+            for future in pending:
+                future.cancel()
+            for shm in blocks.values():
+                shm.close()
+                shm.unlink()
+
+    results = {
+        "labels": np.array([config.label for config in configs]),
+        "levels": np.asarray(levels),
+        "band_levels": np.asarray(band_levels),
+        "bands": bands,
+        "gini": ginis,
+        "interactions": interactions,
+        "seconds": seconds,
+    }
+
+    if save_to is not None:
+        np.savez(save_to, **results)
+
+    return results
@@ -0,0 +1,152 @@
+"""Exact maximum cliques and independent sets of number-match graphs.
+
+Vertex sets are Python ints used as bitsets. The search is branch and bound
+in the style of Tomita's MCQ / San Segundo's BBMC: at every node the
+candidates are greedily colored, and since a clique has at most one vertex
+of each color, the number of colors bounds how much the current clique can
+still grow. Vertices are tried from the highest color down, so most of the
+tree is cut as soon as the bound can't beat the best clique found.
+
+An independent set of a graph is a clique of its complement, so
+``max_independent_set`` runs the same search on the complemented bitsets.
+"""
+import time
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+import networkx as nx
+
+import graff
+
+
+@dataclass
+class Certificate:
+    nodes: list[Hashable]
+    branches: int
+    seconds: float
+
+    @property
+    def size(self) -> int:
+        return len(self.nodes)
+
+
+def to_bitsets(graph: nx.Graph) -> tuple[list[Hashable], list[int]]:
+    """Vertices (highest degree first, which keeps colorings tight) and their neighbor bitsets."""
+    nodes = sorted(graph.nodes, key=lambda node: -graph.degree[node])
+    position = dict((node, k) for k, node in enumerate(nodes))
+
+    adjacency = [0] * len(nodes)
+    for u, v in graph.edges:
+        if u != v:
+            adjacency[position[u]] |= 1 << position[v]
+            adjacency[position[v]] |= 1 << position[u]
+    return nodes, adjacency
+
+
+def complement(adjacency: list[int]) -> list[int]:
+    everyone = (1 << len(adjacency)) - 1
+    return [everyone & ~neighbors & ~(1 << k) for k, neighbors in enumerate(adjacency)]
+
+
+def color_order(candidates: int, adjacency: list[int]) -> list[tuple[int, int]]:
+    """Greedy coloring of ``candidates``: ``(vertex, color)`` in increasing color."""
+    output = []
+    uncolored, color = candidates, 0
+    while uncolored:
+        color += 1
+        available = uncolored
+        while available:
+            low = available & -available
+            v = low.bit_length() - 1
+            uncolored &= ~low
+            available &= ~low & ~adjacency[v]
+            output.append((v, color))
+    return output
+
+
+def max_clique_bitset(adjacency: list[int]) -> tuple[int, int]:
+    """Largest clique as a bitset, and the number of branches searched."""
+    best, best_size = 0, 0
+    branches = 0
+
+    def expand(clique: int, size: int, candidates: int) -> None:
+        nonlocal best, best_size, branches
+        branches += 1
+
+        for v, color in reversed(color_order(candidates, adjacency)):
+            if size + color <= best_size:
+                return
+            bit = 1 << v
+            remaining = candidates & adjacency[v]
+            if remaining:
+                expand(clique | bit, size + 1, remaining)
+            elif size + 1 > best_size:
+                best, best_size = clique | bit, size + 1
+            candidates &= ~bit
+
+    expand(0, 0, (1 << len(adjacency)) - 1)
+    return best, branches
+
+
+def _certificate(nodes: list[Hashable], adjacency: list[int]) -> Certificate:
+    start = time.perf_counter()
+    best, branches = max_clique_bitset(adjacency)
+    members = [nodes[k] for k in range(len(nodes)) if best >> k & 1]
+    return Certificate(members, branches, time.perf_counter() - start)
+
+
+def max_clique(graph: nx.Graph) -> Certificate:
+    nodes, adjacency = to_bitsets(graph)
+    return _certificate(nodes, adjacency)
+
+
+def max_independent_set(graph: nx.Graph) -> Certificate:
+    nodes, adjacency = to_bitsets(graph)
+    return _certificate(nodes, complement(adjacency))
+
+
+def is_clique(graph: nx.Graph, nodes: list[Hashable]) -> bool:
+    return all(graph.has_edge(u, v) for k, u in enumerate(nodes) for v in nodes[k + 1:])
+
+
+def is_independent_set(graph: nx.Graph, nodes: list[Hashable]) -> bool:
+    return not any(graph.has_edge(u, v) for k, u in enumerate(nodes) for v in nodes[k + 1:])
+
+
+def _timed(function, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    output = function(*args)
+    return time.perf_counter() - start, output
+
+
+def benchmark(heights: tuple[int, ...] = (3, 4, 5, 6, 7, 8, 12, 16), m: int = 9,
+              networkx_mis_up_to: Optional[int] = 8) -> None:
+    """Compare with networkx's exact ``max_weight_clique`` and the notebook's approximation.
+
+    networkx's exact search on the (dense) complement gets slow quickly, so
+    the independent-set comparison stops at ``networkx_mis_up_to`` rows.
+    """
+    print(f"{'board':>6} {'clique':>6} {'ours':>9} {'nx exact':>9} {'nx approx':>9}"
+          f" {'mis':>4} {'ours':>9} {'nx exact':>9}")
+
+    for n in heights:
+        graph = graff.make_graph(n, m)
+
+        clique = max_clique(graph)
+        nx_exact, (nx_clique, _) = _timed(nx.max_weight_clique, graph, None)
+        nx_approx, _ = _timed(nx.approximation.max_clique, graph)
+        assert len(nx_clique) == clique.size
+
+        independent = max_independent_set(graph)
+        nx_mis = "-"
+        if networkx_mis_up_to is not None and n <= networkx_mis_up_to:
+            seconds, (nx_set, _) = _timed(nx.max_weight_clique, nx.complement(graph), None)
+            assert len(nx_set) == independent.size
+            nx_mis = f"{seconds * 1000:.1f}ms"
+
+        print(f"{n:>4}x{m} {clique.size:>6} {clique.seconds * 1000:>7.1f}ms {nx_exact * 1000:>7.1f}ms"
+              f" {nx_approx * 1000:>7.1f}ms {independent.size:>4} {independent.seconds * 1000:>7.1f}ms {nx_mis:>9}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,6 +1,8 @@
 from itertools import product
+from typing import TYPE_CHECKING
 
-import networkx as nx
+if TYPE_CHECKING:
+    import networkx as nx
 
 
 AdjacencyList = list[str]
@@ -62,7 +64,10 @@ def make_adjacency_list(n: int, m: int) -> AdjacencyList:
     return list(lines)
 
 
-def make_graph(n: int, m: int) -> nx.Graph:
+def make_graph(n: int, m: int) -> "nx.Graph":
+    # networkx is slow to import and only needed here
+    import networkx as nx
+
     assert m >= 3 and n >= 3
     lines = make_adjacency_list(n, m)
     return nx.parse_adjlist(lines)
@@ -0,0 +1,265 @@
+"""Play number match: find the sequence of pairs that clears the most cells.
+
+The board state is one integer with a bit per cell that is still on the
+board. Two numbers match when they are equal or sum to 10 and they "see"
+each other: the first cells still on the board along one of the rays that
+start at a cell. The rays follow ``graff.get_connections`` (8 directions,
+end of a row to the start of the next, bottom row to top row); cleared cells
+are transparent, so on a full board each ray's first cell is exactly a graff
+neighbor.
+
+Every ray is stored as one or two runs of cells whose indices all go the
+same way, so the first cell of a run that is still on the board is the
+lowest or the highest set bit of ``alive & run``.
+
+Boards with an odd number of cells in some match class can't be cleared
+completely, so the search aims for the fewest cells left. Most random 3x9
+to 6x9 boards take milliseconds; a few need an exhaustive search to prove
+no better end exists, which ``max_nodes`` caps.
+"""
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import graff
+
+
+Move = tuple[int, int]
+Run = tuple[int, bool]  # (cells as a bitmask, whether the ray walks up in index)
+Ray = tuple[Run, ...]
+
+# the second half are the first half reversed; sight is symmetric, so moves only look forward
+DIRECTIONS = [(0, 1), (1, -1), (1, 0), (1, 1), (0, -1), (-1, 1), (-1, 0), (-1, -1)]
+FORWARD = len(DIRECTIONS) // 2 + 1  # ... plus reading order forward
+
+
+def match_class(value: int) -> int:
+    """Numbers only ever pair up inside their class: {1, 9}, {2, 8}, {3, 7}, {4, 6}, {5}."""
+    return min(value, 10 - value)
+
+
+def is_match(a: int, b: int) -> bool:
+    return a == b or a + b == 10
+
+
+def _as_runs(cells: list[int]) -> list[Run]:
+    # split wherever the indices stop going the same way (e.g. bottom row -> top row)
+    runs, current = [], [cells[0]]
+    for cell in cells[1:]:
+        if len(current) > 1 and (cell > current[-1]) != (current[-1] > current[0]):
+            runs.append(current)
+            current = []
+        current.append(cell)
+    runs.append(current)
+
+    output = []
+    for run in runs:
+        ascending = len(run) == 1 or run[1] > run[0]
+        output.append((sum(1 << cell for cell in run), ascending))
+    return output
+
+
+def ray_cells(index: int, direction: tuple[int, int], n: int, m: int) -> list[int]:
+    """Cells along ``direction`` from ``index``, crossing from the bottom row to the top (and back) once."""
+    i, j = graff.to_ij(index, m)
+    di, dj = direction
+    cells, wrapped = [], False
+
+    while True:
+        i, j = i + di, j + dj
+        if not 0 <= j < m:
+            break
+        if not 0 <= i < n:
+            if wrapped or di == 0:
+                break
+            i, wrapped = i % n, True
+        cell = graff.to_index(i, j, m)
+        if cell == index:
+            break
+        cells.append(cell)
+    return cells
+
+
+def make_rays(n: int, m: int) -> list[list[Ray]]:
+    """Every cell's rays, the ``FORWARD`` ones first (empty rays included)."""
+    rays = []
+    for index in range(n * m):
+        cell_rays = [ray_cells(index, direction, n, m) for direction in DIRECTIONS]
+        # reading order, which is how a row's end sees the next row's start
+        cell_rays.insert(FORWARD - 1, list(range(index + 1, n * m)))
+        cell_rays.append(list(range(index - 1, -1, -1)))
+        rays.append([tuple(_as_runs(cells)) if cells else () for cells in cell_rays])
+    return rays
+
+
+def first_alive(alive: int, ray: Ray) -> Optional[int]:
+    for mask, ascending in ray:
+        visible = alive & mask
+        if not visible:
+            continue
+        if ascending:
+            return (visible & -visible).bit_length() - 1
+        return visible.bit_length() - 1
+    return None
+
+
+@dataclass
+class Solution:
+    moves: list[Move]  # best sequence found
+    left: int  # cells still on the board after ``moves``
+    nodes: int
+    seconds: float
+    # False if the node limit stopped the search before it could prove ``left`` is the best
+    complete: bool = True
+
+    @property
+    def cleared(self) -> bool:
+        return self.left == 0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else float("inf")
+
+
+class Board:
+    def __init__(self, values: list[int], m: int = 9) -> None:
+        assert len(values) % m == 0 and all(1 <= v <= 9 for v in values)
+        self.values = list(values)
+        self.m = m
+        self.n = len(values) // m
+        self.rays = make_rays(self.n, self.m)
+        self.forward = [tuple(ray for ray in rays[:FORWARD] if ray) for rays in self.rays]
+
+        # cells each value can pair with, whatever is between them
+        self.partners = [0] * 10
+        for cell, value in enumerate(values):
+            for other in range(1, 10):
+                if is_match(value, other):
+                    self.partners[other] |= 1 << cell
+
+        self.full = (1 << len(values)) - 1
+
+    @classmethod
+    def random(cls, n: int, m: int = 9, seed: Optional[int] = None) -> "Board":
+        rng = random.Random(seed)
+        return cls([rng.randint(1, 9) for _ in range(n * m)], m)
+
+    def neighbor_masks(self, alive: Optional[int] = None) -> list[int]:
+        """For every cell, the cells it currently sees."""
+        alive = self.full if alive is None else alive
+        output = []
+        for rays in self.rays:
+            mask = 0
+            for ray in rays:
+                cell = first_alive(alive, ray)
+                if cell is not None:
+                    mask |= 1 << cell
+            output.append(mask)
+        return output
+
+    def moves(self, alive: int) -> list[Move]:
+        output = []
+        values, partners, forward = self.values, self.partners, self.forward
+        remaining = alive
+        while remaining:
+            low = remaining & -remaining
+            a = low.bit_length() - 1
+            remaining ^= low
+
+            candidates = partners[values[a]] & alive & ~low
+            if not candidates:
+                continue
+            for ray in forward[a]:
+                # first_alive, inlined: this loop is where the solver spends its time
+                for mask, ascending in ray:
+                    visible = alive & mask
+                    if visible:
+                        b = (visible & -visible if ascending else visible).bit_length() - 1
+                        if candidates >> b & 1:
+                            output.append((a, b) if a < b else (b, a))
+                        break
+        return list(dict.fromkeys(output))
+
+    def must_stay(self, alive: int) -> int:
+        """Pairs never leave their class, so every class with an odd count keeps a cell."""
+        counts = [0] * 6
+        for cell, value in enumerate(self.values):
+            if alive >> cell & 1:
+                counts[match_class(value)] += 1
+        return sum(count % 2 for count in counts)
+
+    def solve(self, max_nodes: Optional[int] = None) -> Solution:
+        """Depth-first search for the sequence that clears the most cells.
+
+        States already searched are kept in a transposition table (the order
+        pairs were cleared in doesn't matter), and the search stops as soon
+        as only the cells ``must_stay`` demands are left.
+        """
+        start = time.perf_counter()
+        target = self.must_stay(self.full)
+        seen: set[int] = set()
+        path: list[Move] = []
+        best = [bin(self.full).count("1"), []]
+        nodes = 0
+
+        class NodeLimit(Exception):
+            pass
+
+        def search(alive: int, left: int) -> bool:
+            nonlocal nodes
+            if left < best[0]:
+                best[:] = [left, list(path)]
+                if left == target:
+                    return True
+            if alive in seen:
+                return False
+            seen.add(alive)
+
+            nodes += 1
+            if max_nodes is not None and nodes > max_nodes:
+                raise NodeLimit
+
+            for a, b in self.moves(alive):
+                child = alive & ~(1 << a) & ~(1 << b)
+                if child in seen:
+                    continue
+                path.append((a, b))
+                if search(child, left - 2):
+                    return True
+                path.pop()
+            return False
+
+        complete = True
+        try:
+            search(self.full, best[0])
+        except NodeLimit:
+            complete = False
+
+        return Solution(best[1], best[0], nodes, time.perf_counter() - start, complete)
+
+    def play(self, moves: list[Move]) -> int:
+        """Apply ``moves`` from the full board, checking each one; returns what is left."""
+        alive = self.full
+        for a, b in moves:
+            if (a, b) not in self.moves(alive) and (b, a) not in self.moves(alive):
+                raise ValueError(f"Illegal move {(a, b)}")
+            alive &= ~(1 << a) & ~(1 << b)
+        return alive
+
+
+def benchmark(heights: tuple[int, ...] = (3, 4, 5, 6), boards: int = 20, seed: int = 0,
+              max_nodes: int = 10 ** 6) -> None:
+    for n in heights:
+        results = [Board.random(n, seed=seed + k).solve(max_nodes) for k in range(boards)]
+        nodes = sum(result.nodes for result in results)
+        seconds = sum(result.seconds for result in results)
+        median = sorted(result.seconds for result in results)[boards // 2]
+        optimal = sum(result.complete for result in results)
+        left = sum(result.left for result in results) / boards
+        print(f"{n}x9: {left:.1f} cells left on average, {optimal}/{boards} proven best, "
+              f"median {median * 1000:.1f} ms/board, {nodes / seconds if seconds else 0:,.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    benchmark()
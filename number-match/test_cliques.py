@@ -0,0 +1,43 @@
+import unittest
+
+import networkx as nx
+
+import graff
+from cliques import *
+
+
+class TestCliques(unittest.TestCase):
+    def test_matches_networkx_on_boards(self):
+        for n in [3, 4, 5, 6]:
+            graph = graff.make_graph(n, 9)
+
+            clique = max_clique(graph)
+            self.assertTrue(is_clique(graph, clique.nodes))
+            self.assertEqual(clique.size, len(nx.max_weight_clique(graph, None)[0]))
+
+            independent = max_independent_set(graph)
+            self.assertTrue(is_independent_set(graph, independent.nodes))
+            self.assertEqual(independent.size, len(nx.max_weight_clique(nx.complement(graph), None)[0]))
+
+    def test_matches_networkx_on_random_graphs(self):
+        for seed in range(10):
+            graph = nx.gnp_random_graph(30, 0.5, seed=seed)
+            clique = max_clique(graph)
+            self.assertTrue(is_clique(graph, clique.nodes))
+            self.assertEqual(clique.size, len(nx.max_weight_clique(graph, None)[0]))
+
+    def test_coloring_is_proper(self):
+        _, adjacency = to_bitsets(graff.make_graph(4, 9))
+        colored = color_order((1 << len(adjacency)) - 1, adjacency)
+
+        self.assertEqual(len(colored), len(adjacency))
+        self.assertEqual([c for _, c in colored], sorted(c for _, c in colored))
+        color = dict(colored)
+        for v, neighbors in enumerate(adjacency):
+            for u in range(len(adjacency)):
+                if neighbors >> u & 1:
+                    self.assertNotEqual(color[u], color[v])
+
+
+if __name__ == '__main__':
+    unittest.main()
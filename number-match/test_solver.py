@@ -0,0 +1,58 @@
+import unittest
+
+import graff
+from solver import Board, first_alive, match_class
+
+
+class TestSolver(unittest.TestCase):
+    def test_full_board_masks_are_graff_edges(self):
+        for n in [3, 4, 6]:
+            board = Board.random(n, seed=n)
+            graph = graff.make_graph(n, 9)
+            masks = board.neighbor_masks()
+
+            for index in range(n * 9):
+                expected = set(map(int, graph[str(index)]))
+                output = set(cell for cell in range(n * 9) if masks[index] >> cell & 1)
+                self.assertEqual(expected, output, f"Failed for {index=} {n=}")
+
+    def test_cleared_cells_are_transparent(self):
+        board = Board([1, 2, 9] + [5] * 24)
+        alive = board.full
+        self.assertNotIn((0, 2), board.moves(alive))
+
+        alive &= ~(1 << 1)
+        self.assertIn((0, 2), board.moves(alive))
+        self.assertEqual(first_alive(alive, board.rays[0][0]), 2)
+
+    def test_match_classes(self):
+        self.assertEqual([match_class(v) for v in range(1, 10)], [1, 2, 3, 4, 5, 4, 3, 2, 1])
+        board = Board([1, 9, 2, 8, 3, 7, 4, 6, 5] * 3)
+        self.assertEqual(board.must_stay(board.full), 1)  # three 5s
+
+    def test_clearable_board(self):
+        values = [1, 2, 3, 4, 5, 6, 7, 8, 9,
+                  9, 8, 7, 6, 5, 4, 3, 2, 1,
+                  1, 1, 2, 2, 3, 3, 4, 4, 5,
+                  5, 6, 6, 7, 7, 8, 8, 9, 9]
+        board = Board(values)
+        solution = board.solve()
+
+        self.assertTrue(solution.cleared)
+        self.assertEqual(len(solution.moves), len(values) // 2)
+        self.assertEqual(board.play(solution.moves), 0)
+
+    def test_solution_is_legal_and_hits_the_bound(self):
+        for seed in range(5):
+            board = Board.random(3, seed=seed)
+            solution = board.solve(max_nodes=50000)
+            left = board.play(solution.moves)
+
+            self.assertEqual(bin(left).count("1"), solution.left)
+            if solution.complete:
+                self.assertGreaterEqual(solution.left, board.must_stay(board.full))
+            self.assertGreater(solution.nodes_per_second, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,402 @@
+import random
+import time
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import breadth_first_order
+from scipy.sparse.linalg import splu
+
+from sum_swamp import BoardConfig, Dice, Game, Loop, Parities, Shortcuts
+from board_store import config_hash
+
+
+Objective = Union[str, float]  # "min", "max" or a target expected tau
+
+
+# ------------------------------------------------------------------------------
+# Layout validity and mutations
+# ------------------------------------------------------------------------------
+
+def special_squares(config: BoardConfig) -> List[int]:
+    squares = list((config.numbered or {}).keys()) + list((config.shortcuts or {}).keys())
+    if config.parities:
+        squares += list(config.parities.evens) + list(config.parities.odds)
+    return squares
+
+
+def is_valid(config: BoardConfig) -> bool:
+    """Everything ``Game`` assumes about a board but doesn't check itself."""
+    n = config.n
+    squares = special_squares(config)
+
+    if len(squares) != len(set(squares)) or not all(0 < i < n - 1 for i in squares):
+        return False
+
+    for i, number in (config.numbered or {}).items():
+        if number <= 0 or i - number < 0 or i + number > n - 1:
+            return False
+
+    for i, target in (config.shortcuts or {}).items():
+        if not 0 <= target <= n - 1:
+            return False
+
+    try:
+        loops = config.all_loops
+    except AssertionError:
+        return False  # overlapping loops
+    if any(loop.start < 1 or loop.end >= n - 1 for loop in loops):
+        return False
+
+    return True
+
+
+def has_hop_cycle(game: Game) -> bool:
+    """Whether numbered squares/shortcuts can bounce a player around forever
+    (``Game._traverse`` would never return)."""
+    hops: Dict[int, List[int]] = {}
+    for i in range(game.n):
+        if game[i].shortcut is not None:
+            hops[i] = [game[i].shortcut]
+        elif game[i].number:
+            hops[i] = [game._move(i, game[i].number), game._move(i, -game[i].number)]
+
+    visiting, done = set(), set()
+
+    def visit(i: int) -> bool:
+        if i in done or i not in hops:
+            return False
+        if i in visiting:
+            return True
+        visiting.add(i)
+        cycle = any(visit(j) for j in hops[i])
+        visiting.discard(i)
+        done.add(i)
+        return cycle
+
+    return any(visit(i) for i in hops)
+
+
+def free_squares(config: BoardConfig) -> List[int]:
+    taken = set(special_squares(config))
+    return [i for i in range(1, config.n - 1) if i not in taken]
+
+
+def mutation_kinds(config: BoardConfig) -> List[str]:
+    """The moves ``mutate`` can make on a layout; none means it can't be changed at all."""
+    free = free_squares(config)
+    kinds = []
+    if config.numbered and free:
+        kinds += ["move_numbered", "renumber"]
+    if config.shortcuts:
+        kinds += ["move_shortcut"]
+    if config.parities and free:
+        kinds += ["move_parity"]
+    if config.loop or config.loops:
+        kinds += ["resize_loop"]
+    return kinds
+
+
+def mutate(config: BoardConfig, rng: random.Random, max_number: int = 6) -> Optional[BoardConfig]:
+    """A random neighbouring layout, or ``None`` if the move produced an invalid one."""
+    free = free_squares(config)
+    numbered = dict(config.numbered or {})
+    shortcuts = dict(config.shortcuts or {})
+    kinds = mutation_kinds(config)
+    if not kinds:
+        return None
+
+    kind = rng.choice(kinds)
+    try:
+        if kind == "move_numbered":
+            old = rng.choice(list(numbered))
+            numbered[rng.choice(free)] = numbered.pop(old)
+            candidate = replace(config, numbered=numbered)
+
+        elif kind == "renumber":
+            square = rng.choice(list(numbered))
+            numbered[square] = rng.choice([k for k in range(1, max_number + 1) if k != numbered[square]])
+            candidate = replace(config, numbered=numbered)
+
+        elif kind == "move_shortcut":
+            source = rng.choice(list(shortcuts))
+            target = shortcuts.pop(source)
+            if free and rng.random() < 0.5:
+                source = rng.choice(free)
+            else:
+                target = rng.randrange(1, config.n - 1)
+            shortcuts[source] = target
+            candidate = replace(config, shortcuts=Shortcuts(shortcuts))
+
+        elif kind == "move_parity":
+            evens, odds = set(config.parities.evens), set(config.parities.odds)
+            group = rng.choice([g for g in (evens, odds) if g])
+            group.remove(rng.choice(sorted(group)))
+            group.add(rng.choice(free))
+            candidate = replace(config, parities=Parities(evens=evens, odds=odds))
+
+        else:
+            loops = ([config.loop] if config.loop else []) + list(config.loops or [])
+            k = rng.randrange(len(loops))
+            values = {"start": loops[k].start, "exit": loops[k].exit, "end": loops[k].end}
+            values[rng.choice(list(values))] += rng.choice([-2, -1, 1, 2])
+
+            if config.loop and k == 0:
+                candidate = replace(config, loop=Loop(**values))
+            else:
+                loops[k] = Loop(**values)
+                candidate = replace(config, loops=loops[1:] if config.loop else loops)
+
+    except AssertionError:
+        # Loop/Parities/Shortcuts reject the layout themselves
+        return None
+
+    return candidate if is_valid(candidate) else None
+
+
+def can_always_finish(transition_matrix: np.ndarray) -> bool:
+    """Whether the final square is reachable from every square a turn can start on."""
+    matrix = np.asarray(transition_matrix)
+    n = matrix.shape[0]
+    starts = np.flatnonzero(matrix.any(axis=1))
+    reaches_end = breadth_first_order(sp.csr_matrix(matrix.T), n - 1, directed=True,
+                                      return_predecessors=False)
+    return bool(np.isin(starts, reaches_end).all())
+
+
+def build_game(config: BoardConfig, dice: Dice) -> Optional[Game]:
+    """The board with its transition matrix, or ``None`` if a player could get stuck on it."""
+    game = Game(config, dice)
+    if has_hop_cycle(game):
+        return None
+    game.compute_transition_matrix()
+    if not can_always_finish(game.transition_matrix):
+        return None
+    return game
+
+
+# ------------------------------------------------------------------------------
+# Neighbouring layouts
+# ------------------------------------------------------------------------------
+
+def reached_from(game: Game) -> List[Set[int]]:
+    """Per square, the squares whose turns can land on or hop through it."""
+    reach: Dict[int, Set[int]] = {}
+
+    def hops_from(j: int) -> Set[int]:
+        if j not in reach:
+            space = game[j]
+            targets = []
+            if space.shortcut is not None:
+                targets = [space.shortcut]
+            elif space.number:
+                targets = [game._move(j, -space.number), game._move(j, space.number)]
+            reach[j] = {j}.union(*map(hops_from, targets))
+        return reach[j]
+
+    sources: List[Set[int]] = [set() for _ in range(game.n)]
+    for i in range(game.n):
+        if game[i].number is not None or game[i].shortcut is not None:
+            continue  # never starts a turn
+        for roll in range(len(game.dice.dist)):
+            for j in hops_from(min(game._move(i, roll), game.n - 1)):
+                sources[j].add(i)
+    return sources
+
+
+class Layout:
+    """A playable board, its transition matrix, and which rows every square feeds into.
+
+    ``neighbour`` evaluates a layout that differs in a few squares by
+    recomputing only the rows whose rolls or hops reach those squares (plus
+    the squares' own rows); every other turn plays out exactly as on this
+    board. Moving a loop shifts where rolls land, so that rebuilds everything.
+    A neighbour's ``game.transition_matrix`` only holds the recomputed rows;
+    ``transition_matrix`` is the whole thing.
+    """
+
+    def __init__(self, game: Game, transition_matrix: np.ndarray) -> None:
+        self.game = game
+        self.transition_matrix = transition_matrix
+        self._sources: Optional[List[Set[int]]] = None  # only needed once the layout is accepted
+
+    @classmethod
+    def build(cls, config: BoardConfig, dice: Dice) -> Optional["Layout"]:
+        game = build_game(config, dice)
+        return None if game is None else cls(game, np.array(game.transition_matrix))
+
+    def neighbour(self, config: BoardConfig) -> Optional[Tuple["Layout", Set[int]]]:
+        """``config``'s layout and the rows it may differ in, or ``None`` if a player could get stuck on it."""
+        game = Game(config, self.game.dice)
+        if game.loops != self.game.loops:
+            rows = set(range(game.n))
+        else:
+            if self._sources is None:
+                self._sources = reached_from(self.game)
+            squares = [i for i in range(game.n) if game[i] != self.game[i]]
+            rows = set(squares).union(*(self._sources[i] for i in squares))
+
+        if has_hop_cycle(game):
+            return None
+        game.compute_transition_matrix(sorted(rows))
+        matrix = self.transition_matrix.copy()
+        for i in rows:
+            matrix[i] = game.transition_matrix[i]
+        if not can_always_finish(matrix):
+            return None
+        return Layout(game, matrix), rows
+
+
+# ------------------------------------------------------------------------------
+# Incremental expected-tau solver
+# ------------------------------------------------------------------------------
+
+class IncrementalSolver:
+    """Expected tau for boards that differ from a factorized base in a few rows.
+
+    Expected remaining turns ``t`` solve ``(I - Q) t = 1`` over the
+    non-final squares. The base ``A0 = I - Q0`` is LU-factorized once; a
+    candidate whose matrix differs in rows ``R`` is ``A0 + E_R D`` and is
+    solved with the Woodbury identity, which costs ``|R|`` extra solves
+    against the existing factorization (cached per row) plus an
+    ``|R| x |R|`` dense solve. ``rebase`` re-factorizes, which ``search``
+    does once the accepted layout has drifted too far from the base.
+    """
+
+    def __init__(self, transition_matrix: np.ndarray) -> None:
+        self.rebase(transition_matrix)
+
+    def rebase(self, transition_matrix: np.ndarray) -> None:
+        self.q0 = np.array(transition_matrix, dtype=np.float64)[:-1, :-1]
+        self.lu = splu(sp.csc_matrix(np.identity(len(self.q0)) - self.q0))
+        self.t0 = self.lu.solve(np.ones(len(self.q0)))
+        self._columns: Dict[int, np.ndarray] = {}
+        self.factorizations = getattr(self, "factorizations", 0) + 1
+
+    def _inverse_column(self, i: int) -> np.ndarray:
+        if i not in self._columns:
+            unit = np.zeros(len(self.q0))
+            unit[i] = 1.0
+            self._columns[i] = self.lu.solve(unit)
+        return self._columns[i]
+
+    def changed_rows(self, transition_matrix: np.ndarray, rows: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Rows that differ from the base, looking only at ``rows`` if given."""
+        q = np.asarray(transition_matrix, dtype=np.float64)[:-1, :-1]
+        if rows is None:
+            rows = np.arange(len(q))
+        else:
+            rows = np.array(sorted(i for i in rows if i < len(q)), dtype=np.int64)
+        return rows[np.any(q[rows] != self.q0[rows], axis=1)]
+
+    def expected_tau(self, transition_matrix: np.ndarray, rows: Optional[Iterable[int]] = None) -> float:
+        """Expected tau of ``transition_matrix``; ``rows``, if given, must hold every row that differs from the base."""
+        rows = self.changed_rows(transition_matrix, rows)
+        if len(rows) == 0:
+            return float(self.t0[0])
+
+        d = self.q0[rows] - np.asarray(transition_matrix, dtype=np.float64)[rows, :-1]
+        z = np.column_stack([self._inverse_column(i) for i in rows])
+        small = np.identity(len(rows)) + d @ z
+        correction = z @ np.linalg.solve(small, d @ self.t0)
+        return float(self.t0[0] - correction[0])
+
+
+# ------------------------------------------------------------------------------
+# Simulated annealing
+# ------------------------------------------------------------------------------
+
+@dataclass(order=True)
+class Candidate:
+    score: float
+    tau: float = field(compare=False)
+    config: BoardConfig = field(compare=False)
+
+
+@dataclass
+class SearchResult:
+    best: List[Candidate]
+    evaluations: int
+    accepted: int
+    factorizations: int
+    seconds: float
+
+
+def make_score(objective: Objective) -> Callable[[float], float]:
+    if objective == "min":
+        return lambda tau: tau
+    if objective == "max":
+        return lambda tau: -tau
+    target = float(objective)
+    return lambda tau: abs(tau - target)
+
+
+def search(config: BoardConfig, dice: Dice, objective: Objective = "max", seconds: float = 10.0,
+           seed: Optional[int] = None, top_k: int = 5, temperature: float = 1.0,
+           rebase_after: int = 24, max_number: int = 6,
+           max_evaluations: Optional[int] = None) -> SearchResult:
+    """Anneal board layouts towards ``objective`` for ``seconds``, or ``max_evaluations`` candidates.
+
+    :param objective: ``"min"``/``"max"`` expected tau, or a target value for it
+    :param temperature: starting temperature in score units; it cools
+        linearly to zero over whichever budget runs out first
+    :param rebase_after: re-factorize once the current layout differs from
+        the factorized base in more than this many rows
+    :param max_evaluations: stop after this many candidates, counting the
+        invalid and trapping ones that never get scored; unlike ``seconds``,
+        this gives the same result on any machine
+    """
+    rng = random.Random(seed)
+    score_of = make_score(objective)
+
+    layout = Layout.build(config, dice)
+    if layout is None:
+        raise ValueError("Starting layout can trap a player.")
+
+    solver = IncrementalSolver(layout.transition_matrix)
+    drift: Set[int] = set()  # rows the current layout differs from the factorized base in
+    current = Candidate(score_of(solver.t0[0]), float(solver.t0[0]), config)
+
+    best: Dict[str, Candidate] = {config_hash(config, dice): current}
+    evaluations, accepted = 0, 0
+    start = time.perf_counter()
+    if not mutation_kinds(config):  # and mutations never add or remove special squares
+        return SearchResult([current], evaluations, accepted, solver.factorizations, time.perf_counter() - start)
+
+    def progress() -> float:
+        elapsed = (time.perf_counter() - start) / seconds
+        return max(elapsed, evaluations / max_evaluations) if max_evaluations else elapsed
+
+    while (done := progress()) < 1:
+        evaluations += 1
+        candidate_config = mutate(current.config, rng, max_number)
+        if candidate_config is None:
+            continue
+        neighbour = layout.neighbour(candidate_config)
+        if neighbour is None:
+            continue
+
+        candidate_layout, rows = neighbour
+        tau = solver.expected_tau(candidate_layout.transition_matrix, drift | rows)
+        if not np.isfinite(tau) or tau <= 0:
+            continue
+
+        candidate = Candidate(score_of(tau), tau, candidate_config)
+        heat = temperature * (1 - done)
+        delta = candidate.score - current.score
+        if delta > 0 and (heat <= 0 or rng.random() >= np.exp(-delta / heat)):
+            continue
+
+        current, layout, accepted = candidate, candidate_layout, accepted + 1
+        best.setdefault(config_hash(candidate_config, dice), candidate)
+        if len(best) > 4 * top_k:
+            best = dict(sorted(best.items(), key=lambda x: x[1])[:top_k])
+
+        drift = set(solver.changed_rows(layout.transition_matrix, drift | rows).tolist())
+        if len(drift) > rebase_after:
+            solver.rebase(layout.transition_matrix)
+            drift = set()
+
+    ranked = sorted(best.values())[:top_k]
+    return SearchResult(ranked, evaluations, accepted, solver.factorizations, time.perf_counter() - start)
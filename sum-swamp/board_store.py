@@ -0,0 +1,183 @@
+from hashlib import sha256
+from json import dumps, dump, load
+import os
+from tempfile import NamedTemporaryFile
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from sum_swamp import BoardConfig, Dice, Game, Loop, Parities, Shortcuts, expected_tau, simulate_tau_distribution
+
+
+HASH_VERSION = 2
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".swamp_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+
+def canonical_config(config: BoardConfig, dice: Dice) -> Dict[str, Any]:
+    """Plain, order-independent description of a board and its dice."""
+    parities = None
+    if config.parities:
+        parities = {"evens": sorted(config.parities.evens), "odds": sorted(config.parities.odds)}
+
+    # a loop given as ``loop`` or inside ``loops`` is the same board
+    loops = [{"start": loop.start, "exit": loop.exit, "end": loop.end} for loop in config.all_loops]
+
+    return {
+        "version": HASH_VERSION,
+        "n": config.n,
+        "parities": parities,
+        "numbered": sorted((int(k), int(v)) for k, v in (config.numbered or {}).items()),
+        "shortcuts": sorted((int(k), int(v)) for k, v in (config.shortcuts or {}).items()),
+        "loops": loops,
+        # repr round-trips floats exactly, so equal dice always print the same
+        "dice": {"dist": [repr(float(x)) for x in dice.dist], "p": repr(float(dice.p))},
+    }
+
+
+def config_from_canonical(data: Dict[str, Any]) -> Tuple[BoardConfig, Dice]:
+    """Inverse of ``canonical_config`` (floats may also be given as numbers)."""
+    parities = data.get("parities")
+    config = BoardConfig(
+        n=data["n"],
+        parities=Parities(set(parities["evens"]), set(parities["odds"])) if parities else None,
+        numbered=dict((int(k), int(v)) for k, v in data.get("numbered") or []) or None,
+        shortcuts=Shortcuts(dict((int(k), int(v)) for k, v in data.get("shortcuts") or [])) or None,
+        loops=[Loop(**loop) for loop in data.get("loops") or []] or None,
+    )
+    dice = data["dice"]
+    return config, Dice([float(x) for x in dice["dist"]], p=float(dice.get("p", 0.5)))
+
+
+def config_hash(config: BoardConfig, dice: Dice) -> str:
+    text = dumps(canonical_config(config, dice), sort_keys=True, separators=(",", ":"))
+    return sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """Files keyed by ``(board hash, result name)`` with size-bounded LRU eviction.
+
+    Arrays are stored as ``.npy`` and everything else as JSON. Writes go
+    through a temporary file and ``os.replace``, so concurrent processes never
+    see half-written results; reads bump the file's mtime, which is the LRU
+    clock used by ``evict``.
+
+    The directory is scanned once for its size, after which writes keep a
+    running total; once that passes ``max_bytes``, ``evict`` rescans (picking
+    up other processes' writes) and trims to 90% of it.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, name: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{key}-{name}{suffix}")
+
+    def get(self, key: str, name: str) -> Optional[Any]:
+        for suffix in (".npy", ".json"):
+            location = self._path(key, name, suffix)
+            try:
+                if suffix == ".npy":
+                    value = np.load(location, allow_pickle=False)
+                else:
+                    with open(location, "r") as filehandle:
+                        value = load(filehandle)
+            except (FileNotFoundError, ValueError):
+                continue
+            os.utime(location)
+            return value
+        return None
+
+    def put(self, key: str, name: str, value: Any) -> None:
+        is_array = isinstance(value, np.ndarray)
+        location = self._path(key, name, ".npy" if is_array else ".json")
+
+        with NamedTemporaryFile("wb" if is_array else "w", dir=self.directory,
+                                suffix=".tmp", delete=False) as filehandle:
+            if is_array:
+                np.save(filehandle, value, allow_pickle=False)
+            else:
+                dump(value, filehandle)
+
+        n_bytes = os.path.getsize(filehandle.name)
+        try:
+            n_bytes -= os.path.getsize(location)
+        except FileNotFoundError:
+            pass
+        os.replace(filehandle.name, location)
+
+        self._grow(n_bytes)
+
+    def memoize(self, key: str, name: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key, name)
+        if value is None:
+            value = compute()
+            self.put(key, name, value)
+        return value
+
+    def _stats(self) -> list:
+        return [
+            (entry.stat(), entry.path) for entry in os.scandir(self.directory)
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        ]
+
+    def _grow(self, n_bytes: int) -> None:
+        if self._size is None:
+            self._size = sum(stat.st_size for stat, _ in self._stats())
+        else:
+            self._size += n_bytes
+
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes: Optional[int] = None) -> None:
+        """Drop least recently used results until the directory fits in ``target_bytes``."""
+        target_bytes = int(0.9 * self.max_bytes) if target_bytes is None else target_bytes
+
+        stats = self._stats()
+        size = sum(stat.st_size for stat, _ in stats)
+        for stat, location in sorted(stats, key=lambda x: x[0].st_mtime_ns):
+            if size <= target_bytes:
+                break
+            try:
+                os.remove(location)
+            except FileNotFoundError:
+                pass  # another process got there first
+            size -= stat.st_size
+        self._size = size
+
+
+class CachedBoard:
+    """A board whose transition matrix and derived results live in a ``ResultStore``."""
+
+    def __init__(self, config: BoardConfig, dice: Dice, store: Optional[ResultStore] = None) -> None:
+        self.config = config
+        self.dice = dice
+        self.store = store or ResultStore()
+        self.key = config_hash(config, dice)
+
+    @property
+    def transition_matrix(self) -> np.ndarray:
+        return self.store.memoize(self.key, "transition_matrix", self._compute_transition_matrix)
+
+    def _compute_transition_matrix(self) -> np.ndarray:
+        game = Game(self.config, self.dice)
+        game.compute_transition_matrix()
+        return np.array(game.transition_matrix, dtype=np.float64)
+
+    def expected_tau(self, max_iters: int = 10000) -> float:
+        return self.store.memoize(
+            self.key, f"expected_tau-{max_iters}",
+            lambda: float(expected_tau(self.transition_matrix, max_iters))
+        )
+
+    def tau_distribution(self, n_games: int = 1000000) -> Dict[int, float]:
+        stored = self.store.memoize(
+            self.key, f"tau_distribution-{n_games}",
+            # JSON object keys are strings
+            lambda: dict((str(k), v) for k, v in simulate_tau_distribution(self.transition_matrix, n_games).items())
+        )
+        return dict((int(k), v) for k, v in stored.items())
@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve
+
+from sum_swamp import Game, Parity
+
+
+ADD, SUBTRACT = 1, -1
+
+
+@dataclass
+class Policy:
+    # numbered square -> ADD or SUBTRACT
+    choices: Dict[int, int]
+    # expected remaining turns from every square (for numbered squares and
+    # shortcuts: from the moment a player lands there)
+    values: np.ndarray
+    iterations: int = 0
+
+    @property
+    def expected_tau(self) -> float:
+        return float(self.values[0])
+
+
+class DecisionModel:
+    """The board as a Markov decision process where players pick + or - on numbered squares.
+
+    Built from the same moves as ``Game.compute_transition_matrix``: a sparse
+    matrix of where each roll lands from every square a turn can start on,
+    plus, for every numbered square, where adding and subtracting lead and,
+    for every shortcut, where it goes. Landing squares are resolved
+    through those zero-cost hops according to a policy.
+    """
+
+    def __init__(self, game: Game) -> None:
+        self.game = game
+        n = self.n = game.n
+
+        numbered = [i for i in range(n) if game[i].number is not None]
+        shortcuts = [i for i in range(n) if game[i].number is None and game[i].shortcut is not None]
+
+        self.numbered = np.array(numbered, dtype=np.int64)
+        self.shortcuts = np.array(shortcuts, dtype=np.int64)
+        self.is_special = np.zeros(n, dtype=bool)
+        self.is_special[numbered + shortcuts] = True
+
+        self.add_target = np.array([game._move(i, game[i].number) for i in numbered], dtype=np.int64)
+        self.sub_target = np.array([game._move(i, -game[i].number) for i in numbered], dtype=np.int64)
+        # Game indexes squares with these as they are (a negative one wraps
+        # around to the end of the board), so there is nothing to match
+        off_board = (self.sub_target < 0) | (self.add_target > n - 1)
+        if off_board.any():
+            raise ValueError(f"Numbered squares {self.numbered[off_board].tolist()} can move off the board.")
+        self.shortcut_target = np.array([game[i].shortcut for i in shortcuts], dtype=np.int64)
+
+        # squares a turn can start on, apart from the finish
+        self.rest = np.flatnonzero(~self.is_special[:n - 1])
+        self.rolls = self._roll_matrix()
+
+    def _roll_matrix(self) -> sp.csr_matrix:
+        rows, cols, probs = [], [], []
+        dice = self.game.dice
+
+        for i in self.rest:
+            dist = dice.dist
+            if self.game[i].parity is not None:
+                dist = dice.even if self.game[i].parity == Parity.EVEN else dice.odd
+
+            for roll, prob in enumerate(dist):
+                if prob:
+                    rows.append(i)
+                    cols.append(min(self.game._move(i, roll), self.n - 1))
+                    probs.append(prob)
+
+        return sp.csr_matrix((probs, (rows, cols)), shape=(self.n, self.n))
+
+    def resolve(self, choices: np.ndarray) -> np.ndarray:
+        """Square each landing square ends up on once its hops are followed."""
+        step = np.arange(self.n)
+        step[self.shortcuts] = self.shortcut_target
+        step[self.numbered] = np.where(choices == ADD, self.add_target, self.sub_target)
+
+        resolved = np.arange(self.n)
+        for _ in range(len(self.numbered) + len(self.shortcuts)):
+            resolved = step[resolved]
+
+        if self.is_special[resolved].any():
+            raise ValueError("Policy sends a player around a cycle of numbered squares/shortcuts forever.")
+        return resolved
+
+    def evaluate(self, choices: np.ndarray) -> np.ndarray:
+        """Expected remaining turns from every square under a fixed policy (one sparse solve)."""
+        resolved = self.resolve(choices)
+        hops = sp.csr_matrix((np.ones(self.n), (np.arange(self.n), resolved)), shape=(self.n, self.n))
+        transitions = (self.rolls @ hops).tocsr()
+
+        q = transitions[self.rest][:, self.rest]
+        values = np.zeros(self.n)
+        values[self.rest] = spsolve((sp.identity(len(self.rest), format="csc") - q).tocsc(), np.ones(len(self.rest)))
+        return values[resolved]
+
+    def landing_values(self, values: np.ndarray) -> np.ndarray:
+        """Best achievable value from every landing square, given turn-start values.
+
+        Hops cost nothing, so this is a shortest-path relaxation; squares that
+        can only cycle through hops keep an infinite value.
+        """
+        landing = values.astype(np.float64).copy()
+        landing[self.is_special] = np.inf
+        for _ in range(len(self.numbered) + len(self.shortcuts)):
+            landing[self.shortcuts] = landing[self.shortcut_target]
+            landing[self.numbered] = np.minimum(landing[self.add_target], landing[self.sub_target])
+        return landing
+
+    def improve(self, values: np.ndarray, current: np.ndarray) -> np.ndarray:
+        landing = self.landing_values(values)
+        add, sub = landing[self.add_target], landing[self.sub_target]
+
+        choices = current.copy()
+        choices[add < sub - 1e-12] = ADD
+        choices[sub < add - 1e-12] = SUBTRACT
+        return choices
+
+    def random_choices(self) -> np.ndarray:
+        """The game's own rule as a starting point: go with the likelier operation."""
+        default = ADD if self.game.dice.p >= 0.5 else SUBTRACT
+        return np.full(len(self.numbered), default, dtype=np.int64)
+
+
+def solve(game: Game, max_iters: int = 100, model: Optional[DecisionModel] = None) -> Policy:
+    """Optimal add/subtract choice on every numbered square, by policy iteration.
+
+    Each round is one sparse linear solve for the current policy's values
+    followed by a greedy improvement; it stops when the policy is stable.
+    """
+    model = model or DecisionModel(game)
+
+    # start from the greedy policy w.r.t. the values of the game as it is played
+    # (random + or -), which can't contain hop cycles that have a way out
+    choices = model.random_choices()
+    values = baseline_values(model)
+    choices = model.improve(values, choices)
+
+    iterations = 0
+    values = model.evaluate(choices)
+    while iterations < max_iters:
+        iterations += 1
+        improved = model.improve(values, choices)
+        if np.array_equal(improved, choices):
+            break
+        choices = improved
+        values = model.evaluate(choices)
+
+    return Policy(
+        choices=dict((int(i), int(c)) for i, c in zip(model.numbered, choices)),
+        values=values,
+        iterations=iterations
+    )
+
+
+def baseline_values(model: DecisionModel) -> np.ndarray:
+    game = model.game
+    if not any(map(any, game.transition_matrix)):
+        game.compute_transition_matrix()
+
+    matrix = sp.csr_matrix(np.array(game.transition_matrix, dtype=np.float64))
+    q = matrix[model.rest][:, model.rest]
+    values = np.zeros(model.n)
+    values[model.rest] = spsolve((sp.identity(len(model.rest), format="csc") - q).tocsc(), np.ones(len(model.rest)))
+    return values
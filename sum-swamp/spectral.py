@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from hashlib import sha1
+from typing import Dict, Union
+
+import numpy as np
+import numpy.typing as npt
+import scipy.sparse as sp
+from scipy.sparse.linalg import ArpackNoConvergence, eigs
+
+from sum_swamp import Game
+
+
+DENSE_BELOW = 64  # ARPACK needs k < n - 1; tiny blocks are solved densely
+
+
+@dataclass
+class Spectrum:
+    # leading eigenvalues of the transient block Q, largest modulus first
+    eigenvalues: np.ndarray
+    # quasi-stationary distribution over all squares (0 on the final square):
+    # where a player who hasn't finished yet is, in the long run
+    quasi_stationary: np.ndarray
+
+    @property
+    def decay_rate(self) -> float:
+        """P(tau > t + 1) / P(tau > t) for large t."""
+        return float(self.eigenvalues[0].real)
+
+    @property
+    def spectral_gap(self) -> float:
+        """How much faster than the tail the second mode dies out."""
+        if len(self.eigenvalues) < 2:
+            return 1.0
+        return float(1 - abs(self.eigenvalues[1]) / abs(self.eigenvalues[0]))
+
+    @property
+    def half_life(self) -> float:
+        """Turns for the probability of still playing to halve, in the tail."""
+        return float(np.log(0.5) / np.log(self.decay_rate))
+
+
+_cache: Dict[str, Spectrum] = {}
+
+
+def as_matrix(board: Union[Game, npt.ArrayLike]) -> np.ndarray:
+    if isinstance(board, Game):
+        return np.array(board.transition_matrix, dtype=np.float64)
+    return np.asarray(board, dtype=np.float64)
+
+
+def board_hash(board: Union[Game, npt.ArrayLike]) -> str:
+    matrix = np.ascontiguousarray(as_matrix(board))
+    return sha1(str(matrix.shape).encode() + matrix.tobytes()).hexdigest()
+
+
+def transient_block(transition_matrix: npt.ArrayLike) -> sp.csr_matrix:
+    matrix = as_matrix(transition_matrix)
+    return sp.csr_matrix(matrix[:-1, :-1])
+
+
+def leading_eigenpairs(q: sp.csr_matrix, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Largest-modulus eigenvalues of ``q`` and the matching *left* eigenvectors."""
+    m = q.shape[0]
+    k = min(k, m)
+
+    values = np.empty(0)
+    if m >= DENSE_BELOW and k < m - 1:
+        try:
+            values, vectors = eigs(q.T.tocsc(), k=k, which="LM")
+        except ArpackNoConvergence as error:
+            values, vectors = error.eigenvalues, error.eigenvectors
+
+    # small blocks, or chains too degenerate for ARPACK (e.g. no loops at all)
+    if len(values) == 0:
+        values, vectors = np.linalg.eig(q.T.toarray())
+
+    order = np.argsort(-np.abs(values))[:k]
+    return values[order], vectors[:, order]
+
+
+def spectrum(board: Union[Game, npt.ArrayLike], k: int = 6, use_cache: bool = True) -> Spectrum:
+    """Leading spectrum of the transient block and the quasi-stationary distribution.
+
+    Results are cached by ``board_hash`` (and ``k``) for the life of the process.
+    """
+    key = f"{board_hash(board)}:{k}"
+    if use_cache and key in _cache:
+        return _cache[key]
+
+    q = transient_block(board)
+    values, vectors = leading_eigenpairs(q, k)
+
+    # Perron vector of a nonnegative matrix: real and of one sign
+    leading = np.abs(vectors[:, 0].real)
+    quasi_stationary = np.zeros(q.shape[0] + 1)
+    quasi_stationary[:-1] = leading / leading.sum()
+
+    result = Spectrum(values, quasi_stationary)
+    if use_cache:
+        _cache[key] = result
+    return result
+
+
+def survival(transition_matrix: npt.ArrayLike, max_t: int) -> np.ndarray:
+    """P(tau > t) for t = 0, ..., max_t, starting from square 0."""
+    q = transient_block(transition_matrix).T.tocsr()
+    state = np.zeros(q.shape[0])
+    state[0] = 1.0
+
+    output = np.empty(max_t + 1)
+    for t in range(max_t + 1):
+        output[t] = state.sum()
+        state = q @ state
+    return output
+
+
+def winner_survival(transition_matrix: npt.ArrayLike, players: int, max_t: int) -> np.ndarray:
+    """P(T_min > t) for t = 0, ..., max_t, where T_min is the first finishing
+    time among ``players`` independent players: ``survival ** players``."""
+    return survival(transition_matrix, max_t) ** players
+
+
+def winner_distribution(transition_matrix: npt.ArrayLike, players: int, max_t: int) -> np.ndarray:
+    """P(T_min = t) for t = 0, ..., max_t."""
+    tail = winner_survival(transition_matrix, players, max_t)
+    output = np.empty(max_t + 1)
+    output[0] = 1 - tail[0]
+    output[1:] = tail[:-1] - tail[1:]
+    return output
+
+
+def expected_winner_tau(transition_matrix: npt.ArrayLike, players: int,
+                        tol: float = 1e-12, max_t: int = 10 ** 6) -> float:
+    """E[T_min] = sum over t of P(T_min > t), summed until the terms drop below ``tol``."""
+    q = transient_block(transition_matrix).T.tocsr()
+    state = np.zeros(q.shape[0])
+    state[0] = 1.0
+
+    total = 0.0
+    for _ in range(max_t):
+        term = state.sum() ** players
+        total += term
+        if term < tol:
+            break
+        state = q @ state
+    return total
+
+
+def clear_cache() -> None:
+    _cache.clear()
@@ -1,12 +1,33 @@
 import random
-from typing import Dict, List, Optional, Set, Union, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Union, Tuple
 from enum import Enum
 from dataclasses import dataclass
 from collections import Counter
+from contextlib import nullcontext
+from os import environ
+import sys
+import warnings
 
 import numpy as np
 import numpy.typing as npt
 
+try:
+    import instrument  # noqa: F401  so INSTRUMENT=1 takes effect when the repo root is on the path
+except ImportError:
+    if environ.get("INSTRUMENT", "") not in ("", "0"):
+        warnings.warn("INSTRUMENT is set, but the repo root's instrument module can't be imported "
+                      "from here; nothing will be recorded")
+
+
+def _instrument():
+    """The repo root's ``instrument`` while it is recording, else ``None``.
+
+    Looked up on every call, so it doesn't matter whether ``instrument`` was
+    imported before or after this module, or at all.
+    """
+    module = sys.modules.get("instrument")
+    return module if getattr(module, "ENABLED", False) and hasattr(module, "recorder") else None
+
 
 class Parity(Enum):
     EVEN = 0
@@ -42,6 +63,13 @@ class Parities:
         assert self.evens.isdisjoint(self.odds)
 
 
+class Loops(list):
+    """Loops of a board, ordered by start; no two may share a square."""
+    def __init__(self, loops: List[Loop]) -> None:
+        super(Loops, self).__init__(sorted(loops, key=lambda loop: loop.start))
+        assert all(map(lambda x: x[0].end < x[1].start, zip(self, self[1:])))
+
+
 class Shortcuts(dict):
     def __init__(self, shortcuts: Dict[int, int]) -> None:
         super(Shortcuts, self).__init__(shortcuts)
@@ -55,6 +83,11 @@ class BoardConfig:
     numbered: Optional[Dict[int, int]] = None
     shortcuts: Optional[Shortcuts] = None
     loop: Optional[Loop] = None
+    loops: Optional[List[Loop]] = None
+
+    @property
+    def all_loops(self) -> Loops:
+        return Loops(([self.loop] if self.loop else []) + list(self.loops or []))
 
 
 class Dice:
@@ -104,16 +137,15 @@ class Game:
         if config.shortcuts:
             self._setup_shortcuts(config.shortcuts)
 
-        if config.loop:
-            self._setup_loop(config.loop)
+        self._setup_loops(config.all_loops)
 
     def __getitem__(self, i: int) -> Space:
         return self._board[i]
         
-    def compute_transition_matrix(self) -> None:
-        self.transition_matrix = [[0.0000 for _ in range(self.n)] for _ in range(self.n)]
-        
-        for i in range(self.n):
+    def compute_transition_matrix(self, rows: Optional[Iterable[int]] = None) -> None:
+        """Fill in the transition matrix, or only ``rows`` of it (the rest is left as it is)."""
+        for i in range(self.n) if rows is None else rows:
+            self.transition_matrix[i] = [0.0000 for _ in range(self.n)]
             space = self[i] 
             
             if space.number is not None or space.shortcut is not None:
@@ -127,9 +159,7 @@ class Game:
                 self._add_probability(i, roll, tmp_dist[roll])
 
     def _add_probability(self, i: int, roll: int, prob_of_roll: float) -> None:
-        j = self._adjust_for_loop(i, roll) if self._needs_loop_action(i, roll) else i + roll
-
-        j = min(j, self.n - 1)
+        j = min(self._move(i, roll), self.n - 1)
 
         probs_to_add = [(j, prob_of_roll)]
 
@@ -139,35 +169,58 @@ class Game:
         for k, p in probs_to_add:
             self.transition_matrix[i][k] += p
 
+    def _move(self, i: int, move_up: int) -> int:
+        if self._needs_loop_action(i, move_up):
+            return self._adjust_for_loop(i, move_up)
+        return i + move_up
+
     def _needs_loop_action(self, i: int, move_up: int) -> bool:
-        return any([
-            self.loop_start <= i <= self.loop_end,
-            i < self.loop_start < i + move_up,
-        ])
+        return self._loop_at[i] is not None or self._entered_loop(i, move_up) is not None
+
+    def _entered_loop(self, i: int, move_up: int) -> Optional[Loop]:
+        loop = self._next_loop[i]
+        if loop is not None and loop.start < i + move_up:
+            return loop
+        return None
 
     def _adjust_for_loop(self, i: int, move_up: int) -> int:
-        j = i + move_up
+        loop = self._loop_at[i]
+
+        if loop is None:
+            return self._advance(i, move_up)
 
-        loop_size = (self.loop_end - self.loop_start + 1)
+        if i == loop.exit and move_up > 0:
+            # leaves the loop as if from its end, possibly into the next one
+            return self._advance(loop.end, move_up)
 
-        if i == self.loop_exit and move_up > 0:
-            j = self.loop_end + move_up
+        return self._wrap(loop, i, move_up)
+
+    def _advance(self, i: int, move_up: int) -> int:
+        """Move from a square outside every loop (or leaving one)."""
+        j = i + move_up
+        loop = self._entered_loop(i, move_up)
 
-        elif (self.loop_start <= i <= self.loop_end) or (i < self.loop_start and j > self.loop_end):
-            x = move_up - (self.loop_start - i)
-            j = self.loop_start + (x % loop_size)
+        if loop is not None and j > loop.end:
+            j = self._wrap(loop, i, move_up)
 
         return min(j, self.n - 1)
 
+    def _wrap(self, loop: Loop, i: int, move_up: int) -> int:
+        loop_size = (loop.end - loop.start + 1)
+        x = move_up - (loop.start - i)
+        return min(loop.start + (x % loop_size), self.n - 1)
+
     def _needs_traversal(self, spot: int) -> bool:
         return any([self[spot].shortcut, self[spot].number])
 
     def _traverse(self, space: Space, prob: float) -> List[Tuple[int, float]]:
         output = []
+        hops = 0
 
         spots_to_traverse = [(space, prob)]
         while spots_to_traverse:
             spot, p = spots_to_traverse.pop()
+            hops += 1
 
             if spot.shortcut is not None:
                 if self._needs_traversal(spot.shortcut):
@@ -178,15 +231,17 @@ class Game:
 
             elif spot.number:
                 for m, pp in [(-spot.number, (1 - self.dice.p) * p), (spot.number, self.dice.p * p)]:
-                    j = spot.spot_number + m
-                    if self._needs_loop_action(spot.spot_number, m):
-                        j = self._adjust_for_loop(spot.spot_number, m)
+                    j = self._move(spot.spot_number, m)
 
                     if self._needs_traversal(j):
                         next_spot = (self[j], pp)
                         spots_to_traverse.append(next_spot)
                     else:
                         output.append((j, pp))
+
+        hooks = _instrument()
+        if hooks:
+            hooks.record("sum_swamp.traverse.hops", hops)
         return output
 
     def _setup_parities(self, parities: Parities) -> None:
@@ -204,10 +259,22 @@ class Game:
         for key, val in shortcuts.items():
             self[key].shortcut = val
 
-    def _setup_loop(self, loop: Loop) -> None:
-        self.loop_start = loop.start
-        self.loop_exit = loop.exit
-        self.loop_end = loop.end
+    def _setup_loops(self, loops: Loops) -> None:
+        self.loops = loops
+
+        # per square: the loop it is on, and the first loop starting after it
+        self._loop_at: List[Optional[Loop]] = [None] * self.n
+        self._next_loop: List[Optional[Loop]] = [None] * self.n
+
+        for loop in loops:
+            for i in range(loop.start, min(loop.end, self.n - 1) + 1):
+                self._loop_at[i] = loop
+
+        upcoming = None
+        for i in reversed(range(self.n)):
+            self._next_loop[i] = upcoming
+            if self._loop_at[i] is not None and self._loop_at[i].start == i:
+                upcoming = self._loop_at[i]
 
 
 def expected_tau(transition_matrix: npt.ArrayLike, max_iters: int = 10000) -> float:
@@ -224,12 +291,16 @@ def expected_tau(transition_matrix: npt.ArrayLike, max_iters: int = 10000) -> fl
 
     i = 0
 
-    while (np.linalg.norm(k2 - k1) > 1e-6) and i < max_iters:
-        k1 = k2
-        k2 = one + transition_matrix.dot(k1)
-        np.putmask(k2, mask, 0)
-        i += 1
+    hooks = _instrument()
+    with hooks.span("sum_swamp.expected_tau", n=n) if hooks else nullcontext():
+        while (np.linalg.norm(k2 - k1) > 1e-6) and i < max_iters:
+            k1 = k2
+            k2 = one + transition_matrix.dot(k1)
+            np.putmask(k2, mask, 0)
+            i += 1
 
+    if hooks:
+        hooks.record("sum_swamp.expected_tau.iterations", i)
     return k2[0]
 
 
@@ -0,0 +1,125 @@
+import random
+from dataclasses import replace
+import unittest
+
+import numpy as np
+
+from sum_swamp import *
+from board_search import *
+import test_sum_swamp
+
+
+BOARD_CONFIG = test_sum_swamp.TestBoardIntegration.board_config
+DICE = test_sum_swamp.TestBoardIntegration.dice
+
+FP_ERROR_UP_TO_DIGITS = 6
+
+
+def exact_tau(config: BoardConfig) -> float:
+    game = build_game(config, DICE)
+    matrix = np.array(game.transition_matrix)
+    system = np.identity(len(matrix) - 1) - matrix[:-1, :-1]
+    return np.linalg.solve(system, np.ones(len(system)))[0]
+
+
+class TestMutations(unittest.TestCase):
+    def test_mutations_stay_valid(self):
+        rng = random.Random(0)
+        config = BOARD_CONFIG
+        for _ in range(500):
+            candidate = mutate(config, rng)
+            if candidate is None:
+                continue
+            self.assertTrue(is_valid(candidate))
+            if build_game(candidate, DICE) is not None:
+                config = candidate
+
+    def test_overlapping_squares_are_invalid(self):
+        self.assertTrue(is_valid(BOARD_CONFIG))
+        self.assertFalse(is_valid(replace(BOARD_CONFIG, numbered={1: 1})))  # also a parity square
+        self.assertFalse(is_valid(replace(BOARD_CONFIG, numbered={2: 3})))  # would move off the board
+        self.assertFalse(is_valid(replace(BOARD_CONFIG, shortcuts=Shortcuts({0: 12}))))
+        # would make the finish square part of the loop
+        self.assertFalse(is_valid(BoardConfig(n=20, loop=Loop(start=-1, exit=2, end=4))))
+
+    def test_hop_cycles_are_rejected(self):
+        config = replace(BOARD_CONFIG, shortcuts=Shortcuts({6: 12, 12: 6}))
+        self.assertIsNone(build_game(config, DICE))
+
+
+class TestLayout(unittest.TestCase):
+    def test_neighbours_match_a_full_rebuild(self):
+        rng = random.Random(2)
+        layout, config = Layout.build(BOARD_CONFIG, DICE), BOARD_CONFIG
+        checked = 0
+        while checked < 100:
+            candidate = mutate(config, rng)
+            if candidate is None:
+                continue
+            game, neighbour = build_game(candidate, DICE), layout.neighbour(candidate)
+            self.assertEqual(game is None, neighbour is None)
+            if game is None:
+                continue
+
+            candidate_layout, rows = neighbour
+            np.testing.assert_array_equal(candidate_layout.transition_matrix, np.array(game.transition_matrix))
+            unchanged = [i for i in range(config.n) if i not in rows]
+            np.testing.assert_array_equal(candidate_layout.transition_matrix[unchanged],
+                                          layout.transition_matrix[unchanged])
+            if rng.random() < 0.5:
+                layout, config = candidate_layout, candidate
+            checked += 1
+
+
+class TestIncrementalSolver(unittest.TestCase):
+    def test_woodbury_matches_direct_solve(self):
+        rng = random.Random(1)
+        base = BOARD_CONFIG
+        solver = IncrementalSolver(np.array(build_game(base, DICE).transition_matrix))
+        self.assertAlmostEqual(solver.t0[0], exact_tau(base), FP_ERROR_UP_TO_DIGITS)
+
+        checked = 0
+        while checked < 20:
+            candidate = mutate(base, rng)
+            game = candidate and build_game(candidate, DICE)
+            if game is None:
+                continue
+            matrix = np.array(game.transition_matrix)
+            y_comp = solver.expected_tau(matrix)
+            self.assertAlmostEqual(y_comp, exact_tau(candidate), FP_ERROR_UP_TO_DIGITS)
+            self.assertEqual(solver.expected_tau(matrix, solver.changed_rows(matrix)), y_comp)
+            checked += 1
+
+
+class TestSearch(unittest.TestCase):
+    budget = {"seconds": float("inf"), "max_evaluations": 200}
+
+    def test_search_improves_on_the_start(self):
+        start = exact_tau(BOARD_CONFIG)
+        shortest = search(BOARD_CONFIG, DICE, "min", seed=0, **self.budget)
+        longest = search(BOARD_CONFIG, DICE, "max", seed=0, **self.budget)
+
+        self.assertLess(shortest.best[0].tau, start)
+        self.assertGreater(longest.best[0].tau, start)
+        for result in (shortest, longest):
+            self.assertEqual(result.best, sorted(result.best))
+            y_true = exact_tau(result.best[0].config)
+            self.assertLess(abs(result.best[0].tau - y_true) / y_true, 1e-6)
+
+    def test_search_hits_a_target(self):
+        result = search(BOARD_CONFIG, DICE, 15.0, seed=0, **self.budget)
+        self.assertLess(result.best[0].score, 0.5)
+
+    def test_nothing_to_mutate(self):
+        result = search(BoardConfig(n=20), DICE, "max", seed=0, **self.budget)
+        self.assertEqual((result.evaluations, len(result.best)), (0, 1))
+
+    def test_evaluation_budget(self):
+        first = search(BOARD_CONFIG, DICE, "max", seed=3, **self.budget)
+        again = search(BOARD_CONFIG, DICE, "max", seed=3, **self.budget)
+        self.assertEqual(first.evaluations, 200)
+        self.assertEqual([c.tau for c in first.best], [c.tau for c in again.best])
+
+
+if __name__ == '__main__':
+    unittest.main()
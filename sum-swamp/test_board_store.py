@@ -0,0 +1,91 @@
+import unittest
+from dataclasses import replace
+from tempfile import TemporaryDirectory
+from os import listdir, path
+from json import dumps, loads
+
+import numpy as np
+
+from sum_swamp import *
+from board_store import *
+import test_sum_swamp
+
+
+BOARD_CONFIG = test_sum_swamp.TestBoardIntegration.board_config
+DICE = test_sum_swamp.TestBoardIntegration.dice
+
+
+class TestConfigHash(unittest.TestCase):
+    def test_insertion_order_does_not_matter(self):
+        a = replace(BOARD_CONFIG, numbered={2: 2, 11: 3}, parities=Parities(evens={15, 1}, odds={32, 8}))
+        b = replace(BOARD_CONFIG, numbered={11: 3, 2: 2}, parities=Parities(evens={1, 15}, odds={8, 32}))
+        self.assertEqual(config_hash(a, DICE), config_hash(b, DICE))
+
+    def test_dict_and_list_dice_agree(self):
+        as_dict = Dice(dict(enumerate(DICE.dist)))
+        self.assertEqual(config_hash(BOARD_CONFIG, DICE), config_hash(BOARD_CONFIG, as_dict))
+
+    def test_every_part_of_the_board_matters(self):
+        base = config_hash(BOARD_CONFIG, DICE)
+        variants = [
+            replace(BOARD_CONFIG, n=41),
+            replace(BOARD_CONFIG, parities=Parities(evens={1}, odds={8, 32})),
+            replace(BOARD_CONFIG, numbered={2: 2}),
+            replace(BOARD_CONFIG, shortcuts=Shortcuts({6: 13, 33: 37})),
+            replace(BOARD_CONFIG, loop=Loop(start=21, exit=27, end=30)),
+            replace(BOARD_CONFIG, loop=None),
+        ]
+        hashes = [config_hash(config, DICE) for config in variants]
+        hashes.append(config_hash(BOARD_CONFIG, Dice(DICE.dist, p=0.6)))
+
+        self.assertNotIn(base, hashes)
+        self.assertEqual(len(set(hashes)), len(hashes))
+
+    def test_canonical_round_trip(self):
+        dice = Dice(DICE.dist, p=0.6)
+        for config in [BOARD_CONFIG, replace(BOARD_CONFIG, parities=None, shortcuts=None, loop=None)]:
+            data = loads(dumps(canonical_config(config, dice)))
+            self.assertEqual(config_hash(*config_from_canonical(data)), config_hash(config, dice))
+
+
+class TestResultStore(unittest.TestCase):
+    def test_cached_board_round_trip(self):
+        with TemporaryDirectory() as directory:
+            board = CachedBoard(BOARD_CONFIG, DICE, ResultStore(directory))
+            game = Game(BOARD_CONFIG, DICE)
+            game.compute_transition_matrix()
+
+            np.testing.assert_array_equal(board.transition_matrix, np.array(game.transition_matrix))
+            self.assertAlmostEqual(board.expected_tau(), expected_tau(np.array(game.transition_matrix)))
+
+            again = CachedBoard(BOARD_CONFIG, DICE, ResultStore(directory))
+            self.assertEqual(board.expected_tau(), again.expected_tau())
+            self.assertEqual(len(listdir(directory)), 2)
+
+            distribution = again.tau_distribution(n_games=100)
+            self.assertEqual(distribution, board.tau_distribution(n_games=100))
+            self.assertAlmostEqual(sum(distribution.values()), 1.0)
+
+    def test_eviction_drops_least_recently_used(self):
+        with TemporaryDirectory() as directory:
+            store = ResultStore(directory, max_bytes=3 * (8 * 1000 + 128))  # .npy header included
+            for key in "abc":
+                store.put(key, "x", np.zeros(1000))
+            store.get("a", "x")
+            store.put("d", "x", np.zeros(1000))
+
+            self.assertIsNotNone(store.get("a", "x"))
+            self.assertIsNone(store.get("b", "x"))
+            self.assertIsNotNone(store.get("d", "x"))
+            self.assertLessEqual(store._size, store.max_bytes)
+
+    def test_overwrites_are_counted_once(self):
+        with TemporaryDirectory() as directory:
+            store = ResultStore(directory)
+            for _ in range(3):
+                store.put("a", "x", np.zeros(1000))
+            self.assertEqual(store._size, sum(path.getsize(path.join(directory, name)) for name in listdir(directory)))
+
+
+if __name__ == '__main__':
+    unittest.main()
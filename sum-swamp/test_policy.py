@@ -0,0 +1,63 @@
+import unittest
+from itertools import product
+
+import numpy as np
+
+from sum_swamp import *
+from policy import *
+import test_sum_swamp
+
+
+BOARD_CONFIG = test_sum_swamp.TestBoardIntegration.board_config
+DICE = test_sum_swamp.TestBoardIntegration.dice
+
+FP_ERROR_UP_TO_DIGITS = 5
+
+
+class TestPolicy(unittest.TestCase):
+    def make_game(self, p: float = 0.5) -> Game:
+        game = Game(BOARD_CONFIG, Dice(DICE.dist, p=p))
+        game.compute_transition_matrix()
+        return game
+
+    def test_fixed_policy_matches_game_with_forced_operation(self):
+        model = DecisionModel(self.make_game())
+
+        for p, choice in [(1.0, ADD), (0.0, SUBTRACT)]:
+            forced = self.make_game(p)
+            y_true = expected_tau(np.array(forced.transition_matrix), max_iters=100000)
+            y_comp = model.evaluate(np.full(len(model.numbered), choice))[0]
+            self.assertAlmostEqual(y_true, y_comp, FP_ERROR_UP_TO_DIGITS)
+
+    def test_solution_beats_every_fixed_policy(self):
+        model = DecisionModel(self.make_game())
+        policy = solve(model.game, model=model)
+
+        all_policies = product([ADD, SUBTRACT], repeat=len(model.numbered))
+        best = min(model.evaluate(np.array(choices))[0] for choices in all_policies)
+
+        self.assertAlmostEqual(policy.expected_tau, best, 9)
+        self.assertEqual(set(policy.choices), set(BOARD_CONFIG.numbered))
+
+    def test_choice_is_never_worse_than_chance(self):
+        for p in [0.25, 0.5, 0.75]:
+            game = self.make_game(p)
+            policy = solve(game)
+            self.assertLessEqual(policy.expected_tau, expected_tau(np.array(game.transition_matrix)) + 1e-6)
+
+    def test_no_iterations(self):
+        model = DecisionModel(self.make_game())
+        policy = solve(model.game, max_iters=0, model=model)
+
+        self.assertEqual(policy.iterations, 0)
+        choices = np.array([policy.choices[i] for i in model.numbered])
+        np.testing.assert_allclose(policy.values, model.evaluate(choices))
+
+    def test_rejects_moves_off_the_board(self):
+        game = Game(BoardConfig(n=20, numbered={2: 3}), DICE)
+        with self.assertRaises(ValueError):
+            DecisionModel(game)
+
+
+if __name__ == '__main__':
+    unittest.main()
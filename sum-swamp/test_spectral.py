@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+
+from sum_swamp import *
+from spectral import *
+import test_sum_swamp
+
+
+BOARD_CONFIG = test_sum_swamp.TestBoardIntegration.board_config
+DICE = test_sum_swamp.TestBoardIntegration.dice
+
+FP_ERROR_UP_TO_DIGITS = 5
+
+
+def make_board() -> Game:
+    board = Game(BOARD_CONFIG, DICE)
+    board.compute_transition_matrix()
+    return board
+
+
+class TestSpectrum(unittest.TestCase):
+    board = make_board()
+    matrix = np.array(board.transition_matrix)
+
+    def setUp(self):
+        clear_cache()
+
+    def test_decay_rate_matches_survival_tail(self):
+        result = spectrum(self.board)
+        tail = survival(self.matrix, 200)
+
+        self.assertTrue(0 < result.decay_rate < 1)
+        self.assertAlmostEqual(tail[200] / tail[199], result.decay_rate, FP_ERROR_UP_TO_DIGITS)
+
+    def test_quasi_stationary_is_left_eigenvector(self):
+        result = spectrum(self.board)
+        q = self.matrix[:-1, :-1]
+        pi = result.quasi_stationary[:-1]
+
+        self.assertAlmostEqual(result.quasi_stationary.sum(), 1.0, FP_ERROR_UP_TO_DIGITS)
+        self.assertEqual(result.quasi_stationary[-1], 0.0)
+        np.testing.assert_allclose(pi @ q, result.decay_rate * pi, atol=1e-10)
+
+    def test_survival_sums_to_expected_tau(self):
+        tail = survival(self.matrix, 2000)
+        self.assertAlmostEqual(tail.sum(), expected_tau(self.matrix), 3)
+
+    def test_cache_is_keyed_by_board(self):
+        first = spectrum(self.board)
+        self.assertIs(first, spectrum(self.matrix.tolist()))
+        self.assertEqual(board_hash(self.board), board_hash(self.matrix))
+
+        other = self.matrix.copy()
+        other[0, 0], other[0, 1] = other[0, 1], other[0, 0]
+        self.assertNotEqual(board_hash(other), board_hash(self.matrix))
+
+    def test_sparse_path_agrees_with_dense(self):
+        n = 200
+        matrix = np.zeros((n, n))
+        for i in range(n):
+            for roll, p in enumerate([0.1, 0.3, 0.3, 0.2, 0.1]):
+                matrix[i, min(i + roll, n - 1) if i < 150 or roll < 2 else 120] += p
+
+        values, _ = leading_eigenpairs(transient_block(matrix), 3)
+        dense = np.linalg.eigvals(matrix[:-1, :-1])
+        dense = dense[np.argsort(-np.abs(dense))][:3]
+        np.testing.assert_allclose(np.abs(values), np.abs(dense), atol=1e-8)
+
+
+class TestWinner(unittest.TestCase):
+    board = make_board()
+    matrix = np.array(board.transition_matrix)
+
+    def test_one_player_is_the_single_game(self):
+        self.assertAlmostEqual(expected_winner_tau(self.matrix, 1), expected_tau(self.matrix), 4)
+        np.testing.assert_allclose(winner_survival(self.matrix, 1, 50), survival(self.matrix, 50))
+
+    def test_two_players_match_the_joint_chain(self):
+        # both players' positions as one chain; it stops when either finishes
+        q = self.matrix[:-1, :-1]
+        joint = np.kron(q, q)
+        y_true = np.linalg.solve(np.identity(len(joint)) - joint, np.ones(len(joint)))[0]
+        self.assertAlmostEqual(expected_winner_tau(self.matrix, 2), y_true, FP_ERROR_UP_TO_DIGITS)
+
+    def test_more_players_finish_sooner(self):
+        taus = [expected_winner_tau(self.board, k) for k in (1, 2, 4)]
+        self.assertEqual(taus, sorted(taus, reverse=True))
+
+        distribution = winner_distribution(self.matrix, 3, 2000)
+        self.assertAlmostEqual(distribution.sum(), 1.0, FP_ERROR_UP_TO_DIGITS)
+        self.assertAlmostEqual(distribution @ np.arange(2001), expected_winner_tau(self.matrix, 3), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,15 @@
+from pathlib import Path
+import sys
 import unittest
 
+import numpy as np
+
 from sum_swamp import *
 
+# the repo root's, for `python -m unittest` in this folder; sum_swamp finds it whenever it's imported
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import instrument  # noqa: E402
+
 
 FP_ERROR_UP_TO_DIGITS = 5
 
@@ -231,5 +239,76 @@ class TestBoardIntegration(unittest.TestCase):
             self.assertAlmostEqual(y_true, y_comp, FP_ERROR_UP_TO_DIGITS, msg=message)
 
 
+class TestLoops(unittest.TestCase):
+    dice = TestBoardIntegration.dice
+
+    def make_board(self, **kwargs) -> Game:
+        board = Game(BoardConfig(n=40, **kwargs), self.dice)
+        board.compute_transition_matrix()
+        return board
+
+    def test_board_without_loops(self):
+        board = self.make_board(numbered={2: 2, 11: 3})
+        self.assertFalse(board._needs_loop_action(12, 5))
+        self.assertEqual(board._move(12, 5), 17)
+        self.assertAlmostEqual(sum(board.transition_matrix[0]), 1.0, FP_ERROR_UP_TO_DIGITS)
+
+    def test_loops_cannot_overlap(self):
+        with self.assertRaises(AssertionError):
+            Loops([Loop(start=5, exit=8, end=10), Loop(start=10, exit=12, end=14)])
+
+    def test_single_loop_as_list(self):
+        loop = TestBoardIntegration.board_config.loop
+        as_field = self.make_board(loop=loop)
+        as_list = self.make_board(loops=[loop])
+        self.assertEqual(as_field.transition_matrix, as_list.transition_matrix)
+
+    def test_several_loops(self):
+        board = self.make_board(loops=[Loop(start=20, exit=25, end=27), Loop(start=5, exit=8, end=10)])
+
+        test_input = [(0, 5), (12, 5), (12, 9), (9, -6)]
+        expected = [False, False, True, True]
+        for x, y in zip(test_input, expected):
+            self.assertEqual(board._needs_loop_action(*x), y)
+
+        test_input = [
+            (3, 4),
+            (3, 10),
+            (8, 3),
+            (8, 12),
+            (8, 20),
+            (15, -3),
+            (22, 3),
+        ]
+        expected = [7, 7, 13, 22, 22, 12, 25]
+        for x, y in zip(test_input, expected):
+            self.assertEqual(board._adjust_for_loop(*x), y)
+
+        for row in board.transition_matrix[:-1]:
+            self.assertAlmostEqual(sum(row), 1.0, FP_ERROR_UP_TO_DIGITS)
+
+
+class TestInstrumentation(unittest.TestCase):
+    board = TestBoardIntegration.board
+
+    def test_nothing_is_recorded_by_default(self):
+        instrument.recorder.clear()
+        expected_tau(np.array(self.board.transition_matrix))
+        self.assertEqual(instrument.recorder.summary(), {"spans": {}, "counters": {}, "values": {}})
+
+    def test_hooks_record_when_enabled(self):
+        # landing on 2 adds up to 4, which is numbered too
+        board = Game(BoardConfig(n=20, numbered={2: 2, 4: 1}), TestBoardIntegration.dice)
+        with instrument.recording() as recorder:
+            board.compute_transition_matrix()
+            expected_tau(np.array(board.transition_matrix))
+
+        summary = recorder.summary()
+        self.assertEqual(summary["spans"]["sum_swamp.expected_tau"]["n"], 1)
+        self.assertGreater(summary["values"]["sum_swamp.expected_tau.iterations"]["mean"], 1)
+        self.assertGreaterEqual(summary["values"]["sum_swamp.traverse.hops"]["max"], 2)
+        self.assertFalse(instrument.ENABLED)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,141 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from tempfile import TemporaryDirectory
+from threading import Thread
+from os import utime
+from types import SimpleNamespace
+import unittest
+
+from http_cache import CacheMiss, HttpCache
+import http_cache
+
+
+class Handler(BaseHTTPRequestHandler):
+    """``/page`` has an ETag, ``/flaky`` answers 503 once, ``/<n>`` is ``n`` bytes."""
+    requests = []
+    flaky_failures = 1
+
+    def do_GET(self):
+        Handler.requests.append((self.path, self.headers.get("If-None-Match")))
+
+        if self.path == "/page":
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self.reply(304, b"", {"ETag": '"v1"'})
+            return self.reply(200, b"page", {"ETag": '"v1"'})
+
+        if self.path == "/flaky":
+            if Handler.flaky_failures:
+                Handler.flaky_failures -= 1
+                return self.reply(503, b"busy")
+            return self.reply(200, b"fine")
+
+        n = int(self.path.strip("/"))
+        self.reply(200, self.path.encode("utf-8").ljust(n, b"."))
+
+    def reply(self, status: int, body: bytes, headers: dict = {}):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        Handler.requests = []
+        Handler.flaky_failures = 1
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def cache(self, **kwargs) -> HttpCache:
+        return HttpCache(self.directory.name, **kwargs)
+
+    def test_hit_within_ttl(self):
+        cache = self.cache()
+        first = cache.get(self.base + "/page")
+        second = cache.get(self.base + "/page")
+
+        self.assertEqual((first.content, first.from_cache), (b"page", False))
+        self.assertEqual((second.content, second.from_cache), (b"page", True))
+        self.assertEqual(len(Handler.requests), 1)
+        self.assertEqual(cache.stats(), {"hits": 1, "revalidated": 0, "misses": 1})
+
+    def test_revalidates_after_ttl(self):
+        cache = self.cache(ttl=0)
+        cache.get(self.base + "/page")
+        response = cache.get(self.base + "/page")
+
+        self.assertEqual(Handler.requests, [("/page", None), ("/page", '"v1"')])
+        self.assertEqual((response.status_code, response.content, response.from_cache), (200, b"page", True))
+        self.assertEqual(cache.stats()["revalidated"], 1)
+
+    def test_errors_are_not_stored(self):
+        cache = self.cache()
+        self.assertEqual(cache.get(self.base + "/flaky").status_code, 503)
+        self.assertEqual(cache.get(self.base + "/flaky").content, b"fine")
+        self.assertTrue(cache.get(self.base + "/flaky").from_cache)
+        self.assertEqual(len(Handler.requests), 2)
+
+    def test_stored_errors_are_not_served(self):
+        # as left behind by a version that stored every response
+        cache = self.cache()
+        url = self.base + "/flaky"
+        cache._store(url, SimpleNamespace(status_code=503, content=b"old", headers={}))
+
+        with self.assertRaises(CacheMiss):
+            self.cache(offline=True).get(url)
+        self.assertEqual(cache.get(url).content, b"busy")
+        self.assertEqual(len(Handler.requests), 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = self.cache(max_bytes=250)
+        cache.get(self.base + "/100")
+        cache.get(self.base + "/101")
+        # make /100 the most recently used, whatever the clock resolution
+        utime(cache._meta_path(self.base + "/101"), (0, 0))
+        cache.get(self.base + "/102")
+
+        self.assertIsNotNone(cache._read_meta(self.base + "/100"))
+        self.assertIsNone(cache._read_meta(self.base + "/101"))
+        self.assertIsNotNone(cache._read_meta(self.base + "/102"))
+        self.assertLessEqual(cache._size, 250)
+
+    def test_offline(self):
+        self.cache().get(self.base + "/page")
+        offline = self.cache(offline=True)
+
+        self.assertEqual(offline.get(self.base + "/page").content, b"page")
+        with self.assertRaises(CacheMiss):
+            offline.get(self.base + "/100")
+        self.assertEqual(len(Handler.requests), 1)
+
+
+class TestSharedCache(unittest.TestCase):
+    def test_configured_restores_previous_cache(self):
+        original = http_cache._default_cache  # not default_cache(), which would create .http_cache/ here
+        with TemporaryDirectory() as outer, TemporaryDirectory() as inner:
+            with http_cache.configured(directory=outer) as previous:
+                with http_cache.configured(directory=inner, offline=True) as cache:
+                    self.assertIs(http_cache.default_cache(), cache)
+                    self.assertTrue(cache.offline)
+                self.assertIs(http_cache.default_cache(), previous)
+        self.assertIs(http_cache._default_cache, original)
+
+if __name__ == '__main__':
+    unittest.main()
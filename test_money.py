@@ -0,0 +1,135 @@
+from tempfile import TemporaryDirectory
+from os import path
+import unittest
+
+import numpy as np
+
+from money import (AverageInteraction, FixedTransaction, FractionalInteraction, Monitor, grouped_gini,
+                   matchings, run)
+from money_ensemble import gini, grid, run_ensemble
+
+
+KERNELS = [FixedTransaction(0.5), FractionalInteraction(0.1), AverageInteraction(0.3)]
+
+
+def direct_histogram(population: np.ndarray, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """People and wealth per bin, out-of-range wealth in the first/last bin."""
+    bins = (np.searchsorted(edges, population, side="right") - 1).clip(0, len(edges) - 2)
+    counts = np.bincount(bins, minlength=len(edges) - 1)
+    wealth = np.bincount(bins, weights=population, minlength=len(edges) - 1)
+    return counts, wealth
+
+
+class TestRun(unittest.TestCase):
+    def test_seeded_runs_are_reproducible(self):
+        initial = np.linspace(1, 10, 101)
+        for kernel in KERNELS:
+            first = run(initial, 5_000, kernel, seed=3, block_size=256).population
+            again = run(initial, 5_000, kernel, seed=3, block_size=256).population
+            other = run(initial, 5_000, kernel, seed=4, block_size=256).population
+            np.testing.assert_array_equal(first, again)
+            self.assertFalse(np.array_equal(first, other))
+
+    def test_wealth_is_conserved(self):
+        initial = np.random.default_rng(0).uniform(0, 10, 251)
+        for kernel in KERNELS:
+            result = run(initial, 20_000, kernel, seed=0)
+            self.assertEqual(result.interactions, 20_000)
+            self.assertAlmostEqual(result.population.sum(), initial.sum(), places=8)
+            self.assertTrue((result.population >= 0).all())
+
+    def test_runs_in_place(self):
+        out = np.zeros(10)
+        result = run(5.0, 100, FractionalInteraction(), seed=0, out=out)
+        self.assertIs(result.population, out)
+        self.assertAlmostEqual(out.sum(), 50.0)
+
+    def test_rounds_are_matchings(self):
+        rng = np.random.default_rng(0)
+        total = 0
+        for receivers, givers in matchings(11, 123, rng, block_size=16):
+            both = np.concatenate([receivers, givers])
+            self.assertEqual(len(np.unique(both)), len(both))
+            total += len(receivers)
+        self.assertEqual(total, 123)
+
+    def test_needs_two_individuals(self):
+        with self.assertRaises(ValueError):
+            run([1.0], 10, FractionalInteraction())
+
+
+class TestMonitor(unittest.TestCase):
+    edges = np.linspace(0, 12, 25)
+
+    def check_snapshot(self, monitor: Monitor, population: np.ndarray) -> None:
+        snapshot = monitor.snapshots[-1]
+        counts, wealth = direct_histogram(population, self.edges)
+
+        np.testing.assert_array_equal(snapshot.counts, counts)
+        self.assertAlmostEqual(snapshot.mean, population.mean(), places=8)
+        self.assertAlmostEqual(snapshot.variance, population.var(), places=6)
+        self.assertAlmostEqual(snapshot.gini, grouped_gini(counts, wealth), places=6)
+
+    def test_incremental_snapshots_match_direct_computation(self):
+        initial = np.random.default_rng(1).uniform(0, 10, 400)
+        monitor = Monitor(self.edges, every=50)
+        result = run(initial, 30_000, FractionalInteraction(0.2), seed=0, monitor=monitor)
+
+        self.assertTrue(monitor.incremental)
+        self.assertEqual(monitor.snapshots[-1].interactions, 30_000)
+        self.check_snapshot(monitor, result.population)
+
+    def test_recomputed_snapshots_match_direct_computation(self):
+        initial = np.random.default_rng(2).uniform(0, 10, 100)
+        store = np.zeros((20, len(self.edges) - 1), dtype=np.int64)
+        monitor = Monitor(self.edges, every=500, store=store)
+        result = run(initial, 5_000, AverageInteraction(0.5), seed=0, monitor=monitor)
+
+        self.assertFalse(monitor.incremental)
+        self.assertEqual(len(monitor.snapshots), 10)
+        self.check_snapshot(monitor, result.population)
+        np.testing.assert_array_equal(store[9], monitor.snapshots[-1].counts)
+        self.assertEqual(store[:10].sum(axis=1).tolist(), [100] * 10)
+
+    def test_callback_stops_run(self):
+        monitor = Monitor(self.edges, every=100, callback=lambda snapshot: snapshot.interactions >= 300)
+        result = run([5.0] * 50, 10_000, FractionalInteraction(), seed=0, monitor=monitor)
+        self.assertEqual(result.interactions, 300)
+
+    def test_stops_once_settled(self):
+        # every individual in one bin: the histogram never moves
+        monitor = Monitor([0, 100], every=100, tol=1e-3, patience=2)
+        result = run([5.0] * 50, 100_000, AverageInteraction(), seed=0, monitor=monitor)
+        self.assertLess(result.interactions, 100_000)
+
+
+class TestEnsemble(unittest.TestCase):
+    def test_output_shapes(self):
+        configs = grid([FractionalInteraction(0.1), FixedTransaction(0.5)], sizes=[10, 21], time_per_individual=50)
+        levels, band_levels = np.linspace(0, 1, 5), np.array([0.1, 0.9])
+
+        with TemporaryDirectory() as directory:
+            save_to = path.join(directory, "ensemble.npz")
+            results = run_ensemble(configs, replicas=3, seed=0, levels=levels, band_levels=band_levels,
+                                   workers=2, save_to=save_to)
+            with np.load(save_to) as saved:
+                np.testing.assert_array_equal(saved["bands"], results["bands"])
+
+        self.assertEqual(results["labels"].shape, (4,))
+        self.assertEqual(results["bands"].shape, (4, 2, 5))
+        self.assertEqual(results["gini"].shape, (4, 3))
+        self.assertEqual(results["seconds"].shape, (4, 3))
+        np.testing.assert_array_equal(results["interactions"], [[c.interactions] * 3 for c in configs])
+        # bands are ordered quantiles of ordered quantiles
+        self.assertTrue((np.diff(results["bands"], axis=1) >= 0).all())
+        self.assertTrue((np.diff(results["bands"], axis=2) >= 0).all())
+
+        again = run_ensemble(configs, replicas=3, seed=0, levels=levels, band_levels=band_levels, workers=2)
+        np.testing.assert_array_equal(again["gini"], results["gini"])
+
+    def test_gini(self):
+        np.testing.assert_allclose(gini(np.array([[1.0, 1.0, 1.0], [0.0, 0.0, 3.0]])), [0.0, 2 / 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
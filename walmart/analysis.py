@@ -0,0 +1,90 @@
+"""Store/population/crime aggregation for the Walmart hours analysis.
+
+``summarize`` does what the notebook's ``merge_data`` did, but with one
+groupby over the stores and one join against the population and crime
+tables instead of a filter per state. It works at any granularity the store
+table has a column for (``state``, ``city``, ``postalCode``); the population
+and crime mappings just have to be keyed the same way.
+"""
+from typing import Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from store_data import to_minutes
+
+
+DataFrame = pd.DataFrame
+
+STATES = [
+    'ALABAMA', 'ALASKA', 'ARIZONA', 'ARKANSAS', 'CALIFORNIA', 'COLORADO', 'CONNECTICUT', 'DELAWARE', 'FLORIDA',
+    'GEORGIA', 'HAWAII', 'IDAHO', 'ILLINOIS', 'INDIANA', 'IOWA', 'KANSAS', 'KENTUCKY', 'LOUISIANA', 'MAINE',
+    'MARYLAND', 'MASSACHUSETTS', 'MICHIGAN', 'MINNESOTA', 'MISSISSIPPI', 'MISSOURI', 'MONTANA', 'NEBRASKA',
+    'NEVADA', 'NEW HAMPSHIRE', 'NEW JERSEY', 'NEW MEXICO', 'NEW YORK', 'NORTH CAROLINA', 'NORTH DAKOTA', 'OHIO',
+    'OKLAHOMA', 'OREGON', 'PENNSYLVANIA', 'RHODE ISLAND', 'SOUTH CAROLINA', 'SOUTH DAKOTA', 'TENNESSEE', 'TEXAS',
+    'UTAH', 'VERMONT', 'VIRGINIA', 'WASHINGTON', 'WEST VIRGINIA', 'WISCONSIN', 'WYOMING', 'DISTRICT OF COLUMBIA',
+    'PUERTO RICO'
+]
+
+ABBREVIATIONS = [
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA',
+    'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH', 'OK',
+    'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY', 'DC', 'PR'
+]
+
+ABBREVIATION_MAP = dict((key, val) for key, val in zip(STATES, ABBREVIATIONS))
+
+
+def by_abbreviation(values: Mapping[str, float]) -> dict[str, float]:
+    """Re-key a ``{"Texas": ...}`` mapping as ``{"TX": ...}``."""
+    return dict((ABBREVIATION_MAP[key.upper()], val) for key, val in values.items())
+
+
+def open_hours(stores: DataFrame) -> np.ndarray:
+    """Hours each store is open; a closing time before noon means after midnight."""
+    if "startMin" in stores and "endMin" in stores:
+        start, end = stores["startMin"].to_numpy(), stores["endMin"].to_numpy()
+    else:
+        start, end = to_minutes(stores["startHr"]), to_minutes(stores["endHr"])
+
+    minutes = end.astype(np.int32) - start
+    minutes = np.where(end < 12 * 60, minutes + 24 * 60, minutes)
+    return minutes / 60
+
+
+def summarize(stores: DataFrame, population: Mapping, crime: Optional[Mapping] = None,
+              by: str = "state") -> DataFrame:
+    """One row per key of ``population`` with store counts, people per store,
+    mean opening hours and (if given) crime rate.
+
+    Keys without any stores get ``n_stores`` 0, ``people_per_store`` NaN and
+    ``mean_hrs`` 0. Stores whose key is not in ``population`` are ignored.
+    """
+    keys = pd.Index(list(population.keys()), name=by)
+
+    per_key = (
+        pd.DataFrame({by: np.asarray(stores[by]), "hours": open_hours(stores)})
+        .groupby(by, observed=True)["hours"]
+        .agg(["size", "mean"])
+        .reindex(keys)
+    )
+
+    n_stores = per_key["size"].fillna(0).astype(int)
+    n_people = pd.Series(population, dtype=float).reindex(keys)
+
+    output = pd.DataFrame({
+        "n_stores": n_stores,
+        "people_per_store": n_people / n_stores.replace(0, np.nan),
+        "mean_hrs": per_key["mean"].fillna(0.0),
+    })
+
+    if crime is not None:
+        output["crime_rate"] = pd.Series(crime, dtype=float).reindex(keys)
+
+    return output.reset_index()
+
+
+def merge_data(wm_data: DataFrame, pop_data: Mapping, cr_data: Mapping) -> DataFrame:
+    """Same columns as the notebook's ``merge_data`` used to return."""
+    summary = summarize(wm_data, pop_data, cr_data, by="state")
+    return summary[["state", "people_per_store", "mean_hrs", "crime_rate"]]
@@ -0,0 +1,67 @@
+"""Microbenchmark: the old per-key page parsing against ``get_infos``.
+
+    python bench_extract.py [page.html ...]
+
+Pass saved store pages to time them; without arguments a synthetic page of
+roughly the size of a real store page is used.
+"""
+from sys import argv
+from json import dumps
+from timeit import repeat
+
+from walmart_scrapper import get_info, get_infos
+
+
+KEYS = ["address", "dailyHours"]
+
+
+def synthetic_page(padding_kb: int = 400) -> str:
+    filler = '<div class="x">' + "lorem ipsum " * 40 + "</div>\n"
+    address = {
+        "postalCode": "72756",
+        "address": "2110 W Walnut St",
+        "city": "Rogers",
+        "state": "AR",
+        "country": "US",
+        "streetAddress": "2110 W Walnut St",
+    }
+    hours = {"startHr": "06:00", "endHr": "23:00"}
+    n_filler = (padding_kb * 1024) // len(filler)
+    return "".join([
+        filler * (n_filler // 2),
+        f'<script>{{"store":{{"address":{dumps(address)},',
+        filler * (n_filler // 2),
+        f'"operationalHours":{{"dailyHours":{dumps(hours)}}}}}}}</script>',
+    ])
+
+
+def old_extract(text: str) -> list[dict]:
+    # what parse_store_page used to do: a membership scan per key, then get_info per key
+    if not all(map(lambda x: x in text, KEYS)):
+        return []
+    return [get_info(text, key) for key in KEYS]
+
+
+def time_page(text: str, number: int = 20) -> tuple[float, float]:
+    old = min(repeat(lambda: old_extract(text), number=number, repeat=5))
+    new = min(repeat(lambda: get_infos(text, KEYS), number=number, repeat=5))
+    return old / number, new / number
+
+
+def main() -> None:
+    pages = {path: open(path, encoding="utf-8").read() for path in argv[1:]}
+    if not pages:
+        pages = {"synthetic": synthetic_page()}
+
+    for name, text in pages.items():
+        expected = old_extract(text)
+        found = get_infos(text, KEYS)
+        assert [found.get(key) for key in KEYS] == expected, f"{name}: extractors disagree"
+
+        old, new = time_page(text)
+        print(f"{name} ({len(text) // 1024} KB): get_info {old * 1e3:.3f} ms, "
+              f"get_infos {new * 1e3:.3f} ms, {old / new:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
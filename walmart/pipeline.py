@@ -0,0 +1,416 @@
+"""The notebook's analysis as stages that only rebuild when their inputs change.
+
+    python pipeline.py                   # build everything that is stale, print the regression
+    python pipeline.py --status          # what would run, without running it
+    python pipeline.py --force stores    # rebuild a stage (and whatever its output changes)
+    python pipeline.py --offline         # scrapers only answer from the HTTP cache
+
+The scrapers (and ``--offline``) use the repo root's ``http_cache``, so when
+they have to run, put the root on the path: ``PYTHONPATH=.. python pipeline.py``.
+
+Each stage declares the stages it depends on, the files it reads, the files
+it writes and the modules doing its work. Its fingerprint is a SHA-256 over
+its name, version and source, the source files of those modules, the
+contents of the files it reads and the content digests of its dependencies'
+artifacts, and it is rebuilt only when that fingerprint differs
+from the one in the manifest (or an artifact/output is missing). Because
+dependencies enter by content rather than by fingerprint, a rebuild that
+produces the same arrays stops there instead of rebuilding everything below.
+
+The scrapers are sources: they read nothing the pipeline knows about, so
+they only run when the file they write is missing or they are forced.
+
+Stages get the pipeline's root and read and write everything under it by
+absolute path; nothing changes the working directory. Artifacts are dicts of NumPy arrays saved as ``.npz`` (no pickles) under
+``.pipeline_cache/``. Stages whose dependencies are done run concurrently on
+a thread pool, so e.g. the population table, the crime table and the store
+table load side by side.
+"""
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from hashlib import sha256
+from importlib.util import find_spec
+from inspect import getsource
+from json import dump, dumps, load
+from os import replace
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+import sys
+import time
+
+import numpy as np
+
+
+HERE = Path(__file__).resolve().parent
+CACHE_DIR = HERE / ".pipeline_cache"
+MANIFEST = "manifest.json"
+
+Arrays = dict[str, np.ndarray]
+
+
+class Stage(NamedTuple):
+    name: str
+    run: Callable[[dict[str, Arrays], Path], Optional[Arrays]]  # (dependencies' arrays, root)
+    deps: tuple = ()
+    files: tuple = ()  # read, relative to the pipeline's root
+    outputs: tuple = ()  # written besides the artifact
+    modules: tuple = ()  # whose code the stage calls, so editing them rebuilds it
+    version: int = 1
+
+    @property
+    def is_source(self) -> bool:
+        return not self.deps and not self.files
+
+
+# ------------------------------------------------------------------------------
+# Stages: ({dependency name: arrays}, root) -> arrays
+# ------------------------------------------------------------------------------
+
+def scrape_crime(_: dict, root: Path) -> None:
+    import wiki_scrapper
+    wiki_scrapper.main(str(root / wiki_scrapper.SAVE_LOCATION))
+
+
+def scrape_stores(_: dict, root: Path) -> None:
+    import walmart_scrapper
+    walmart_scrapper.main(str(root / walmart_scrapper.JOURNAL_NAME), str(root / walmart_scrapper.SAVE_NAME))
+
+
+def _keyed(values: dict) -> Arrays:
+    from analysis import by_abbreviation
+
+    values = by_abbreviation(values)
+    return {"state": np.array(list(values), dtype=str), "value": np.array(list(values.values()), dtype=float)}
+
+
+def crime(_: dict, root: Path) -> Arrays:
+    # wiki_scrapper.SAVE_LOCATION, without importing the scraper
+    with open(root / "crime_2018.json", "r") as filehandle:
+        return _keyed(load(filehandle))
+
+
+def population(_: dict, root: Path) -> Arrays:
+    with open(root / "state_population_2018.json", "r") as filehandle:
+        return _keyed(load(filehandle))
+
+
+def stores(_: dict, root: Path) -> Arrays:
+    from store_data import SAVE_NAME, load_stores
+
+    frame = load_stores(str(root / SAVE_NAME), columns=["state", "startMin", "endMin"])
+    return {
+        "state": frame["state"].to_numpy().astype(str),
+        "startMin": frame["startMin"].to_numpy(),
+        "endMin": frame["endMin"].to_numpy(),
+    }
+
+
+def summary(inputs: dict[str, Arrays], _: Path) -> Arrays:
+    import pandas as pd
+    from analysis import merge_data
+
+    as_mapping = lambda arrays: dict(zip(arrays["state"].tolist(), arrays["value"].tolist()))
+    summarized = merge_data(
+        pd.DataFrame(inputs["stores"]), as_mapping(inputs["population"]), as_mapping(inputs["crime"])
+    )
+    # the state column comes back as objects, which .npz can only store pickled
+    return dict(
+        (column, summarized[column].to_numpy(dtype=str if column == "state" else float))
+        for column in summarized.columns
+    )
+
+
+def normalized(inputs: dict[str, Arrays], _: Path) -> Arrays:
+    """z-scores as in the notebook (sample standard deviation, NaNs left out)."""
+    output = dict(inputs["summary"])
+    for column in ["crime_rate", "people_per_store", "mean_hrs"]:
+        values = output[column].astype(float)
+        output[column] = (values - np.nanmean(values)) / np.nanstd(values, ddof=1)
+    return output
+
+
+def ols(inputs: dict[str, Arrays], _: Path) -> Arrays:
+    """``crime_rate ~ people_per_store + mean_hrs`` without an intercept, like the notebook's OLS."""
+    data = inputs["normalized"]
+    y = data["crime_rate"]
+    x = np.column_stack([data["people_per_store"], data["mean_hrs"]])
+    keep = np.isfinite(y) & np.isfinite(x).all(axis=1)
+    y, x = y[keep], x[keep]
+
+    coef, _, _, _ = np.linalg.lstsq(x, y, rcond=None)
+    residuals = y - x @ coef
+    dof = len(y) - x.shape[1]
+    stderr = np.sqrt(np.diag(residuals @ residuals / dof * np.linalg.inv(x.T @ x)))
+    return {
+        "names": np.array(["people_per_store", "mean_hrs"]),
+        "coef": coef,
+        "stderr": stderr,
+        "t": coef / stderr,
+        # uncentered, since there is no intercept
+        "r_squared": np.array(1 - (residuals @ residuals) / (y @ y)),
+        "n": np.array(len(y)),
+    }
+
+
+STAGES = [
+    Stage("scrape_crime", scrape_crime, outputs=("crime_2018.json",)),
+    Stage("scrape_stores", scrape_stores, outputs=("walmart_data.csv",)),
+    Stage("crime", crime, deps=("scrape_crime",), files=("crime_2018.json",), modules=("analysis",)),
+    Stage("population", population, files=("state_population_2018.json",), modules=("analysis",)),
+    Stage("stores", stores, deps=("scrape_stores",), files=("walmart_data.csv",), modules=("store_data",)),
+    Stage("summary", summary, deps=("stores", "population", "crime"), modules=("analysis",)),
+    Stage("normalized", normalized, deps=("summary",)),
+    Stage("ols", ols, deps=("normalized",)),
+]
+
+
+# ------------------------------------------------------------------------------
+# Fingerprints, artifacts and the manifest
+# ------------------------------------------------------------------------------
+
+def file_digest(file_path: Path) -> str:
+    digest = sha256()
+    with open(file_path, "rb") as filehandle:
+        for chunk in iter(lambda: filehandle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def arrays_digest(arrays: Optional[Arrays]) -> str:
+    """Digest of the arrays themselves; ``.npz`` files embed timestamps, so their bytes won't do."""
+    digest = sha256()
+    for key in sorted(arrays or {}):
+        value = np.ascontiguousarray(arrays[key])
+        digest.update(f"{key}:{value.dtype.str}:{value.shape}".encode("utf-8"))
+        digest.update(value.tobytes())
+    return digest.hexdigest()
+
+
+def module_digest(name: str) -> str:
+    spec = find_spec(name)
+    if spec is None or spec.origin is None:
+        raise ImportError(f"can't find the source of {name}")
+    return file_digest(Path(spec.origin))
+
+
+def fingerprint(stage: Stage, root: Path, digests: dict[str, str]) -> str:
+    return sha256(dumps({
+        "name": stage.name,
+        "version": stage.version,
+        "code": getsource(stage.run),
+        "modules": dict((name, module_digest(name)) for name in stage.modules),
+        "files": dict((name, file_digest(root / name)) for name in stage.files),
+        "deps": dict((name, digests[name]) for name in stage.deps),
+    }, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def artifact_path(cache_dir: Path, stage: Stage) -> Path:
+    return cache_dir / f"{stage.name}.npz"
+
+
+def write_artifact(file_path: Path, arrays: Optional[Arrays]) -> None:
+    tmp_path = file_path.with_suffix(".tmp.npz")
+    np.savez(tmp_path, **(arrays or {}))
+    replace(tmp_path, file_path)
+
+
+def read_artifact(file_path: Path) -> Arrays:
+    with np.load(file_path, allow_pickle=False) as cached:
+        return dict((key, cached[key]) for key in cached.files)
+
+
+def read_manifest(cache_dir: Path) -> dict:
+    try:
+        with open(cache_dir / MANIFEST, "r") as filehandle:
+            return load(filehandle)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_manifest(cache_dir: Path, manifest: dict) -> None:
+    tmp_path = cache_dir / (MANIFEST + ".tmp")
+    with open(tmp_path, "w") as filehandle:
+        dump(manifest, filehandle, indent=1, sort_keys=True)
+    replace(tmp_path, cache_dir / MANIFEST)
+
+
+# ------------------------------------------------------------------------------
+# Running
+# ------------------------------------------------------------------------------
+
+class Report(NamedTuple):
+    stage: str
+    status: str  # "ran", "cached" or "failed"
+    seconds: float
+
+
+class Pipeline:
+    def __init__(self, stages: list[Stage] = STAGES, root: Path = HERE, cache_dir: Path = CACHE_DIR) -> None:
+        self.stages = dict((stage.name, stage) for stage in stages)
+        self.root = Path(root)
+        self.cache_dir = Path(cache_dir)
+        for stage in stages:
+            unknown = set(stage.deps) - set(self.stages)
+            if unknown:
+                raise ValueError(f"{stage.name} depends on unknown stages: {sorted(unknown)}")
+        self.order = self._toposort()
+
+    def _toposort(self) -> list[str]:
+        order, visiting, done = [], set(), set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"dependency cycle through {name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def upstream(self, targets: list[str]) -> list[str]:
+        """``targets`` and everything they depend on, in dependency order."""
+        needed, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages[name].deps)
+        return [name for name in self.order if name in needed]
+
+    def _is_fresh(self, stage: Stage, entry: Optional[dict], stamp: Optional[str]) -> bool:
+        if entry is None or not artifact_path(self.cache_dir, stage).exists():
+            return stage.is_source and all((self.root / name).exists() for name in stage.outputs)
+        if not all((self.root / name).exists() for name in stage.outputs):
+            return False
+        return stage.is_source or entry.get("fingerprint") == stamp
+
+    def status(self, targets: Optional[list[str]] = None, force: tuple = ()) -> dict[str, bool]:
+        """Which stages would be rebuilt, assuming every rebuild changes its artifact."""
+        manifest = read_manifest(self.cache_dir)
+        stale: dict[str, bool] = {}
+        for name in self.upstream(targets or self.order):
+            stage = self.stages[name]
+            entry = manifest.get(name)
+            if name in force or any(stale[dep] for dep in stage.deps):
+                stale[name] = True
+                continue
+            digests = dict((dep, manifest.get(dep, {}).get("digest", "")) for dep in stage.deps)
+            try:
+                stamp = fingerprint(stage, self.root, digests)
+            except (FileNotFoundError, ImportError):
+                stamp = None
+            stale[name] = not self._is_fresh(stage, entry, stamp)
+        return stale
+
+    def run(self, targets: Optional[list[str]] = None, force: tuple = (),
+            jobs: int = 4) -> tuple[dict[str, Arrays], list[Report]]:
+        """Bring ``targets`` (default: every stage) up to date; return their arrays and what happened."""
+        self.cache_dir.mkdir(exist_ok=True)
+        manifest = read_manifest(self.cache_dir)
+        names = self.upstream(targets or self.order)
+        results: dict[str, Arrays] = {}
+        reports: list[Report] = []
+        running: dict[Future, str] = {}
+        pending = list(names)
+
+        def build(stage: Stage, inputs: dict[str, Arrays]) -> tuple[str, Arrays, str, float]:
+            start = time.perf_counter()
+            digests = dict((dep, manifest[dep]["digest"]) for dep in stage.deps)
+            entry = manifest.get(stage.name)
+            stamp = fingerprint(stage, self.root, digests)
+            if stage.name not in force and self._is_fresh(stage, entry, stamp):
+                path = artifact_path(self.cache_dir, stage)
+                arrays = read_artifact(path) if path.exists() else {}
+                return "cached", arrays, stamp, time.perf_counter() - start
+
+            arrays = stage.run(inputs, self.root) or {}
+            write_artifact(artifact_path(self.cache_dir, stage), arrays)
+            return "ran", arrays, stamp, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            failed = None
+            while pending or running:
+                for name in [name for name in pending if all(dep in results for dep in self.stages[name].deps)]:
+                    if failed is not None:
+                        break
+                    stage = self.stages[name]
+                    inputs = dict((dep, results[dep]) for dep in stage.deps)
+                    running[pool.submit(build, stage, inputs)] = name
+                    pending.remove(name)
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        status, arrays, stamp, seconds = future.result()
+                    except Exception as error:
+                        failed = failed or error
+                        reports.append(Report(name, "failed", 0.0))
+                        continue
+
+                    results[name] = arrays
+                    reports.append(Report(name, status, seconds))
+                    # only the main thread touches the manifest
+                    manifest[name] = {"fingerprint": stamp, "digest": arrays_digest(arrays)}
+                    write_manifest(self.cache_dir, manifest)
+
+            if failed is not None:
+                raise failed
+
+        return dict((name, results[name]) for name in (targets or names)), reports
+
+
+def format_ols(result: Arrays) -> str:
+    lines = [f"{'':<20}{'coef':>10}{'std err':>10}{'t':>10}"]
+    for name, coef, stderr, t in zip(result["names"], result["coef"], result["stderr"], result["t"]):
+        lines.append(f"{name:<20}{coef:>10.4f}{stderr:>10.4f}{t:>10.3f}")
+    lines.append(f"R-squared (uncentered): {float(result['r_squared']):.4f}, n = {int(result['n'])}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    from argparse import ArgumentParser
+
+    pipeline = Pipeline()
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", help=f"stages to build (default: all of {', '.join(pipeline.order)})")
+    parser.add_argument("--force", nargs="+", default=[], choices=pipeline.order, help="rebuild these stages")
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--offline", action="store_true", help="scrapers only answer from the HTTP cache")
+    parser.add_argument("--status", action="store_true", help="list stale stages and exit")
+    args = parser.parse_args(argv)
+    unknown = set(args.targets) - set(pipeline.order)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    if args.status:
+        for name, stale in pipeline.status(args.targets, tuple(args.force)).items():
+            print(f"{name:<15} {'stale' if stale else 'up to date'}")
+        return 0
+
+    if args.offline:
+        try:
+            import http_cache
+        except ImportError:
+            parser.error("--offline needs the repo root on the path: PYTHONPATH=.. python pipeline.py --offline")
+        http_cache.configure(offline=True)
+
+    results, reports = pipeline.run(args.targets, tuple(args.force), args.jobs)
+    for report in reports:
+        print(f"{report.stage:<15} {report.status:<7} {report.seconds:.3f}s", file=sys.stderr)
+    if "ols" in results:
+        print(format_ols(results["ols"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""Nearest-store and coverage queries over the stores' postal codes.
+
+Postal codes are geocoded offline against a zip-centroid table,
+``zip_centroids.npz``, built once with ``build_centroid_table`` from the
+Census Bureau's ZCTA gazetteer file (``20xx_Gaz_zcta_national.txt``). Points
+are placed on the unit sphere, so a ``cKDTree`` over them gives exact
+great-circle nearest neighbours. Bulk queries run on all cores, and
+``StoreIndex.nearest`` / ``StoreIndex.count_within`` can cache their results
+on disk.
+
+    >>> centroids = ZipCentroids.load()
+    >>> stores = load_stores(columns=["postalCode", "startMin", "endMin"])
+    >>> index = StoreIndex(stores[is_24_hour(stores)], centroids)
+    >>> km, which = index.nearest(*centroids.coordinates(centroids.zips))
+"""
+from hashlib import sha1
+from os import makedirs, path, replace
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+
+DataFrame = pd.DataFrame
+
+EARTH_RADIUS_KM = 6371.0088
+CENTROIDS_NAME = "zip_centroids.npz"
+CACHE_DIR = ".spatial_cache"
+
+
+def build_centroid_table(gazetteer_path: str, save_name: str = CENTROIDS_NAME) -> None:
+    """Convert the Census ZCTA gazetteer (tab separated) into ``save_name``."""
+    table = pd.read_csv(gazetteer_path, sep="\t", dtype={"GEOID": str})
+    table.columns = table.columns.str.strip()
+    table = table.sort_values("GEOID")
+    np.savez(
+        save_name,
+        zips=table["GEOID"].astype(np.int32).to_numpy(),
+        lat=table["INTPTLAT"].to_numpy(np.float64),
+        lon=table["INTPTLONG"].to_numpy(np.float64),
+    )
+
+
+class ZipCentroids:
+    def __init__(self, zips: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> None:
+        order = np.argsort(zips)
+        self.zips = np.asarray(zips, dtype=np.int32)[order]
+        self.lat = np.asarray(lat, dtype=np.float64)[order]
+        self.lon = np.asarray(lon, dtype=np.float64)[order]
+
+    @classmethod
+    def load(cls, location: str = CENTROIDS_NAME) -> "ZipCentroids":
+        if not path.exists(location):
+            raise FileNotFoundError(
+                f"{location} is missing; build it with build_centroid_table() "
+                "from the Census ZCTA gazetteer file"
+            )
+        with np.load(location, allow_pickle=False) as table:
+            return cls(table["zips"], table["lat"], table["lon"])
+
+    def lookup(self, postal_codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Row in the table for every postal code, and whether it was found at all."""
+        postal_codes = np.asarray(postal_codes, dtype=np.int32)
+        rows = np.searchsorted(self.zips, postal_codes).clip(0, len(self.zips) - 1)
+        return rows, self.zips[rows] == postal_codes
+
+    def coordinates(self, postal_codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Latitude and longitude per postal code, NaN for unknown ones."""
+        rows, found = self.lookup(postal_codes)
+        return np.where(found, self.lat[rows], np.nan), np.where(found, self.lon[rows], np.nan)
+
+
+def to_xyz(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def km_to_chord(km: float) -> float:
+    return 2 * np.sin(min(km / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+def is_24_hour(stores: DataFrame) -> np.ndarray:
+    if "startMin" in stores:
+        return ((stores["startMin"] == 0) & (stores["endMin"] == 24 * 60)).to_numpy()
+    return ((stores["startHr"] == "00:00") & (stores["endHr"] == "24:00")).to_numpy()
+
+
+class StoreIndex:
+    """Ball tree (a KD-tree on the unit sphere) over the geocoded stores.
+
+    Stores whose postal code is not in the centroid table are left out;
+    ``store_rows`` maps tree positions back to rows of ``stores``.
+    """
+
+    def __init__(self, stores: DataFrame, centroids: ZipCentroids, cache_dir: Optional[str] = CACHE_DIR) -> None:
+        lat, lon = centroids.coordinates(stores["postalCode"].to_numpy())
+        located = ~np.isnan(lat)
+
+        self.stores = stores
+        self.store_rows = np.flatnonzero(located)
+        self.tree = cKDTree(to_xyz(lat[located], lon[located]))
+        self.cache_dir = cache_dir
+
+        self._fingerprint = sha1(self.tree.data.tobytes()).hexdigest()
+
+    def nearest(self, lat: np.ndarray, lon: np.ndarray, k: int = 1,
+                use_cache: bool = True) -> tuple[np.ndarray, np.ndarray]:
+        """Great-circle distance (km) to, and row in ``stores`` of, the ``k`` nearest stores.
+
+        Points with NaN coordinates, and the places past the last store when
+        ``k`` is larger than the number of stores, get ``inf`` distance and
+        row ``-1``.
+        """
+        points = to_xyz(lat, lon)
+
+        def compute() -> dict[str, np.ndarray]:
+            valid = ~np.isnan(points).any(axis=1)
+            km = np.full((len(points), k), np.inf)
+            rows = np.full((len(points), k), -1, dtype=np.int64)
+            if self.tree.n == 0:
+                return {"km": km, "rows": rows}
+
+            chord, which = self.tree.query(points[valid], k=k, workers=-1)
+            chord, which = chord.reshape(-1, k), which.reshape(-1, k)
+            # missing neighbours come back as index tree.n
+            found = which < self.tree.n
+            km[valid] = np.where(found, chord_to_km(chord), np.inf)
+            rows[valid] = np.where(found, self.store_rows[np.minimum(which, self.tree.n - 1)], -1)
+            return {"km": km, "rows": rows}
+
+        result = self._cached(f"nearest-{k}", points, compute) if use_cache else compute()
+        if k == 1:
+            return result["km"][:, 0], result["rows"][:, 0]
+        return result["km"], result["rows"]
+
+    def count_within(self, lat: np.ndarray, lon: np.ndarray, radius_km: float,
+                     use_cache: bool = True) -> np.ndarray:
+        """Number of stores within ``radius_km`` of every point."""
+        points = to_xyz(lat, lon)
+
+        def compute() -> dict[str, np.ndarray]:
+            valid = ~np.isnan(points).any(axis=1)
+            counts = np.zeros(len(points), dtype=np.int64)
+            counts[valid] = self.tree.query_ball_point(
+                points[valid], km_to_chord(radius_km), return_length=True, workers=-1
+            )
+            return {"counts": counts}
+
+        if not use_cache:
+            return compute()["counts"]
+        return self._cached(f"within-{radius_km!r}", points, compute)["counts"]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Rows in ``stores`` within ``radius_km`` of a single point."""
+        which = self.tree.query_ball_point(to_xyz([lat], [lon])[0], km_to_chord(radius_km))
+        return self.store_rows[np.asarray(which, dtype=np.int64)]
+
+    def _cached(self, query: str, points: np.ndarray, compute) -> dict[str, np.ndarray]:
+        if self.cache_dir is None:
+            return compute()
+
+        key = sha1(f"{self._fingerprint}:{query}".encode() + points.tobytes()).hexdigest()
+        location = path.join(self.cache_dir, f"{key}.npz")
+        if path.exists(location):
+            with np.load(location, allow_pickle=False) as cached:
+                return dict((name, cached[name]) for name in cached.files)
+
+        result = compute()
+        makedirs(self.cache_dir, exist_ok=True)
+        np.savez(location + ".tmp.npz", **result)
+        replace(location + ".tmp.npz", location)
+        return result
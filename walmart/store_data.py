@@ -0,0 +1,154 @@
+"""Typed, cached loading of the scraped store data.
+
+``load_stores`` parses ``walmart_data.csv`` once and keeps a columnar copy in
+a NumPy ``.npz`` next to it. Opening hours are stored as integer minutes
+since midnight (``startMin``/``endMin``), ``state`` comes back as a pandas
+categorical and ``postalCode`` as an integer. The cache remembers the CSV's
+mtime, size and SHA-256: an untouched CSV is never read again, a touched but
+identical one only costs a hash, and a changed one rebuilds the cache.
+
+The free-text columns dominate load time, so ask only for what you need::
+
+    >>> stores = load_stores(columns=["state", "startMin", "endMin"])
+"""
+from hashlib import sha256
+from os import path, replace, stat
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+DataFrame = pd.DataFrame
+
+SAVE_NAME = "walmart_data.csv"  # walmart_scrapper.SAVE_NAME, without importing the scraper
+
+CACHE_VERSION = 1
+STRING_COLUMNS = ["address", "city", "startHr", "endHr"]
+INT_COLUMNS = {"postalCode": np.int32, "storeNumber": np.int32}
+COLUMNS = ["postalCode", "address", "city", "state", "startHr", "endHr", "startMin", "endMin", "storeNumber"]
+META_KEYS = ["__version__", "__mtime_ns__", "__size__", "__sha256__"]
+
+
+def to_minutes(times: pd.Series) -> np.ndarray:
+    """Turn ``"HH:MM"`` strings into minutes since midnight, without a Python loop."""
+    parts = times.astype(str).str.split(":", n=1, expand=True)
+    hours = parts[0].astype(np.int16).to_numpy()
+    # "07" (no minutes) is 07:00, whether some or all of the times are written that way
+    minutes = parts[1].fillna("0").astype(np.int16).to_numpy() if parts.shape[1] > 1 else 0
+    return (60 * hours + minutes).astype(np.int16)
+
+
+def default_cache_path(csv_path: str) -> str:
+    root, _ = path.splitext(csv_path)
+    return f"{root}.npz"
+
+
+def file_digest(file_path: str) -> str:
+    digest = sha256()
+    with open(file_path, "rb") as filehandle:
+        for chunk in iter(lambda: filehandle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_columns(csv_path: str) -> dict[str, np.ndarray]:
+    raw = pd.read_csv(csv_path, dtype={"state": str, "startHr": str, "endHr": str})
+    raw = raw.loc[:, ~raw.columns.str.startswith("Unnamed")]
+
+    states = raw["state"].astype("category")
+    columns = {
+        "state_codes": states.cat.codes.to_numpy().astype(np.int8),
+        "state_categories": states.cat.categories.to_numpy().astype(str),
+        "startMin": to_minutes(raw["startHr"]),
+        "endMin": to_minutes(raw["endHr"]),
+    }
+
+    for column, dtype in INT_COLUMNS.items():
+        columns[column] = raw[column].to_numpy().astype(dtype)
+
+    for column in STRING_COLUMNS:
+        columns[column] = raw[column].to_numpy().astype(str)
+
+    return columns
+
+
+def write_cache(cache_path: str, columns: dict[str, np.ndarray], source: dict) -> None:
+    tmp_path = cache_path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        __version__=np.array(CACHE_VERSION),
+        __mtime_ns__=np.array(source["mtime_ns"]),
+        __size__=np.array(source["size"]),
+        __sha256__=np.array(source["sha256"]),
+        **columns
+    )
+    replace(tmp_path, cache_path)
+
+
+def array_names(columns: list[str]) -> list[str]:
+    names = []
+    for column in columns:
+        names.extend(["state_codes", "state_categories"] if column == "state" else [column])
+    return names
+
+
+def read_cache(cache_path: str, csv_path: str, columns: list[str]) -> Optional[dict[str, np.ndarray]]:
+    if not path.exists(cache_path):
+        return None
+
+    # npz members are read lazily, so only the requested columns are loaded
+    with np.load(cache_path, allow_pickle=False) as cached:
+        if int(cached["__version__"]) != CACHE_VERSION:
+            return None
+
+        mtime_ns, size, digest = (
+            int(cached["__mtime_ns__"]), int(cached["__size__"]), str(cached["__sha256__"])
+        )
+
+        source = stat(csv_path)
+        fresh = source.st_mtime_ns == mtime_ns and source.st_size == size
+        # touched (checkout, copy) but possibly unchanged: compare contents
+        unchanged = fresh or (source.st_size == size and file_digest(csv_path) == digest)
+        if not unchanged:
+            return None
+
+        names = array_names(columns) if fresh else [key for key in cached.files if key not in META_KEYS]
+        arrays = dict((key, cached[key]) for key in names)
+
+    if not fresh:
+        write_cache(cache_path, arrays, {
+            "mtime_ns": source.st_mtime_ns, "size": size, "sha256": digest
+        })
+    return arrays
+
+
+def to_frame(arrays: dict[str, np.ndarray], columns: list[str]) -> DataFrame:
+    data = {}
+    for column in columns:
+        if column == "state":
+            data[column] = pd.Categorical.from_codes(arrays["state_codes"], arrays["state_categories"])
+        else:
+            data[column] = arrays[column]
+    return pd.DataFrame(data)
+
+
+def load_stores(csv_path: str = SAVE_NAME, cache_path: Optional[str] = None,
+                columns: Optional[list[str]] = None) -> DataFrame:
+    cache_path = cache_path or default_cache_path(csv_path)
+    columns = COLUMNS if columns is None else columns
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {sorted(unknown)}")
+
+    arrays = read_cache(cache_path, csv_path, columns)
+    if arrays is None:
+        source = stat(csv_path)
+        arrays = build_columns(csv_path)
+        write_cache(cache_path, arrays, {
+            "mtime_ns": source.st_mtime_ns,
+            "size": source.st_size,
+            "sha256": file_digest(csv_path),
+        })
+
+    return to_frame(arrays, columns)
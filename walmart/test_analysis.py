@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from analysis import by_abbreviation, merge_data, open_hours, summarize
+
+
+STORES = pd.DataFrame({
+    "state": ["TX", "TX", "AR", "NV"],
+    "startHr": ["06:30", "00:00", "07:00", "06:00"],
+    "endHr": ["22:00", "24:00", "01:00", "23:00"],
+})
+POPULATION = {"TX": 30.0, "AR": 3.0, "OK": 4.0}
+CRIME = {"TX": 4.1, "AR": 5.4, "OK": 4.6}
+
+
+class TestAnalysis(unittest.TestCase):
+    def test_open_hours(self):
+        # minutes count, and closing before noon is the next day
+        np.testing.assert_allclose(open_hours(STORES), [15.5, 24.0, 18.0, 17.0])
+
+        minutes = pd.DataFrame({"startMin": [390, 420], "endMin": [1320, 60]})
+        np.testing.assert_allclose(open_hours(minutes), [15.5, 18.0])
+
+    def test_summarize(self):
+        summary = summarize(STORES, POPULATION, CRIME).set_index("state")
+
+        self.assertEqual(list(summary.index), ["TX", "AR", "OK"])  # NV has no population entry
+        self.assertEqual(summary["n_stores"].tolist(), [2, 1, 0])
+        self.assertEqual(summary.loc["TX", "people_per_store"], 15.0)
+        self.assertEqual(summary.loc["TX", "mean_hrs"], 19.75)
+
+        # a state without stores
+        self.assertTrue(np.isnan(summary.loc["OK", "people_per_store"]))
+        self.assertEqual(summary.loc["OK", "mean_hrs"], 0.0)
+        self.assertEqual(summary.loc["OK", "crime_rate"], 4.6)
+
+    def test_merge_data(self):
+        merged = merge_data(STORES, POPULATION, CRIME)
+        self.assertEqual(list(merged.columns), ["state", "people_per_store", "mean_hrs", "crime_rate"])
+        self.assertEqual(merged["crime_rate"].tolist(), [4.1, 5.4, 4.6])
+
+    def test_by_abbreviation(self):
+        self.assertEqual(by_abbreviation({"Texas": 1.0, "district of columbia": 2.0}), {"TX": 1.0, "DC": 2.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
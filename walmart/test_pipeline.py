@@ -0,0 +1,133 @@
+from importlib import invalidate_caches
+from os import getcwd
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import sys
+import unittest
+
+import numpy as np
+
+from pipeline import Pipeline, Stage
+
+
+RUNS = []
+WORKING_DIRECTORIES = []
+
+
+def numbers(_: dict, root: Path) -> dict:
+    RUNS.append("numbers")
+    WORKING_DIRECTORIES.append(getcwd())
+    return {"x": np.loadtxt(root / "numbers.txt", ndmin=1)}
+
+
+def signs(inputs: dict, _: Path) -> dict:
+    RUNS.append("signs")
+    return {"sign": np.sign(inputs["numbers"]["x"])}
+
+
+def count(inputs: dict, _: Path) -> dict:
+    RUNS.append("count")
+    return {"positive": np.array((inputs["signs"]["sign"] > 0).sum())}
+
+
+def toy_step(_: dict, root: Path) -> dict:
+    RUNS.append("toy_step")
+    return {}
+
+
+def broken(inputs: dict, _: Path) -> dict:
+    RUNS.append("broken")
+    raise RuntimeError("broken stage")
+
+
+STAGES = [
+    Stage("numbers", numbers, files=("numbers.txt",)),
+    Stage("signs", signs, deps=("numbers",)),
+    Stage("count", count, deps=("signs",)),
+]
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        self.write("numbers.txt", "1 -2 3")
+        RUNS.clear()
+        WORKING_DIRECTORIES.clear()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name: str, text: str) -> None:
+        (self.root / name).write_text(text)
+
+    def pipeline(self, stages: list = STAGES) -> Pipeline:
+        return Pipeline(stages, root=self.root, cache_dir=self.root / "cache")
+
+    def statuses(self, reports: list) -> dict:
+        return dict((report.stage, report.status) for report in reports)
+
+    def test_second_run_is_cached(self):
+        results, reports = self.pipeline().run()
+        self.assertEqual(int(results["count"]["positive"]), 2)
+        self.assertEqual(set(self.statuses(reports).values()), {"ran"})
+
+        _, reports = self.pipeline().run()
+        self.assertEqual(set(self.statuses(reports).values()), {"cached"})
+        self.assertEqual(RUNS, ["numbers", "signs", "count"])
+        self.assertEqual(self.pipeline().status(), {"numbers": False, "signs": False, "count": False})
+        self.assertEqual(WORKING_DIRECTORIES, [getcwd()])  # stages get the root, not a chdir
+
+    def test_changed_file_rebuilds_downstream(self):
+        self.pipeline().run()
+        self.write("numbers.txt", "1 -2 -3")
+        self.assertEqual(self.pipeline().status(), {"numbers": True, "signs": True, "count": True})
+
+        results, reports = self.pipeline().run()
+        self.assertEqual(set(self.statuses(reports).values()), {"ran"})
+        self.assertEqual(int(results["count"]["positive"]), 1)
+
+    def test_unchanged_artifact_stops_the_rebuild(self):
+        self.pipeline().run()
+        self.write("numbers.txt", "1 -2 4")  # same signs
+
+        _, reports = self.pipeline().run()
+        self.assertEqual(self.statuses(reports), {"numbers": "ran", "signs": "ran", "count": "cached"})
+
+    def test_force(self):
+        self.pipeline().run()
+        _, reports = self.pipeline().run(force=("signs",))
+        self.assertEqual(self.statuses(reports), {"numbers": "cached", "signs": "ran", "count": "cached"})
+
+    def test_version_and_modules_are_fingerprinted(self):
+        self.write("toy_module.py", "SCALE = 1\n")
+        sys.path.insert(0, str(self.root))
+        self.addCleanup(sys.path.remove, str(self.root))
+        invalidate_caches()
+
+        stage = Stage("toy", toy_step, modules=("toy_module",), files=("numbers.txt",))
+        self.pipeline([stage]).run()
+        self.assertFalse(self.pipeline([stage]).status()["toy"])
+
+        self.write("toy_module.py", "SCALE = 2\n")
+        self.assertTrue(self.pipeline([stage]).status()["toy"])
+        self.pipeline([stage]).run()
+        self.assertTrue(self.pipeline([stage._replace(version=2)]).status()["toy"])
+
+    def test_failure(self):
+        stages = STAGES[:1] + [Stage("signs", broken, deps=("numbers",)), STAGES[2]]
+        with self.assertRaises(RuntimeError):
+            self.pipeline(stages).run()
+        self.assertEqual(RUNS, ["numbers", "broken"])  # nothing after the failure
+
+        # what succeeded is kept; the failed stage and everything below it runs next time
+        _, reports = self.pipeline().run()
+        self.assertEqual(self.statuses(reports), {"numbers": "cached", "signs": "ran", "count": "ran"})
+
+    def test_unknown_dependency(self):
+        with self.assertRaises(ValueError):
+            self.pipeline([Stage("signs", signs, deps=("numbers",))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from spatial import EARTH_RADIUS_KM, StoreIndex, ZipCentroids, is_24_hour
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def make_centroids(n: int = 200, seed: int = 0) -> ZipCentroids:
+    rng = np.random.default_rng(seed)
+    zips = rng.choice(np.arange(10_000, 99_999), size=n, replace=False)
+    return ZipCentroids(zips, rng.uniform(25, 49, n), rng.uniform(-124, -67, n))
+
+
+class TestStoreIndex(unittest.TestCase):
+    centroids = make_centroids()
+
+    def setUp(self):
+        self.cache = TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache.cleanup()
+
+    def index(self, postal_codes) -> StoreIndex:
+        return StoreIndex(pd.DataFrame({"postalCode": postal_codes}), self.centroids, self.cache.name)
+
+    def test_lookup(self):
+        lat, lon = self.centroids.coordinates([self.centroids.zips[3], 1])
+        self.assertEqual(lat[0], self.centroids.lat[3])
+        self.assertEqual(lon[0], self.centroids.lon[3])
+        self.assertTrue(np.isnan(lat[1]) and np.isnan(lon[1]))
+
+    def test_nearest_matches_brute_force(self):
+        # every other zip has a store, plus one the table doesn't know
+        index = self.index(np.append(self.centroids.zips[::2], 1))
+        lat, lon = self.centroids.lat, self.centroids.lon
+        km, rows = index.nearest(lat, lon, k=3)
+
+        stores = np.arange(0, len(self.centroids.zips), 2)
+        distances = haversine_km(lat[:, None], lon[:, None], lat[stores][None, :], lon[stores][None, :])
+        expected = np.sort(distances, axis=1)[:, :3]
+        np.testing.assert_allclose(km, expected, atol=1e-6)
+        np.testing.assert_array_equal(rows, np.argsort(distances, axis=1)[:, :3])
+
+    def test_nearest_pads_when_k_exceeds_stores(self):
+        index = self.index(self.centroids.zips[:2])
+        km, rows = index.nearest(self.centroids.lat[:5], self.centroids.lon[:5], k=3)
+
+        self.assertEqual(km.shape, (5, 3))
+        self.assertTrue(np.isfinite(km[:, :2]).all())
+        self.assertTrue(np.isinf(km[:, 2]).all())
+        np.testing.assert_array_equal(rows[:, 2], -1)
+        self.assertEqual(set(rows[:, :2].ravel()), {0, 1})
+
+    def test_unknown_points(self):
+        index = self.index(self.centroids.zips[:10])
+        km, rows = index.nearest(np.array([np.nan, self.centroids.lat[0]]), np.array([0.0, self.centroids.lon[0]]))
+        self.assertEqual((km[0], rows[0]), (np.inf, -1))
+        self.assertEqual((km[1], rows[1]), (0.0, 0))
+
+    def test_count_within_matches_brute_force(self):
+        index = self.index(self.centroids.zips)
+        lat, lon = self.centroids.lat[:20], self.centroids.lon[:20]
+        counts = index.count_within(lat, lon, 500)
+
+        distances = haversine_km(lat[:, None], lon[:, None], self.centroids.lat[None, :], self.centroids.lon[None, :])
+        np.testing.assert_array_equal(counts, (distances <= 500).sum(axis=1))
+        np.testing.assert_array_equal(np.sort(index.within(lat[0], lon[0], 500)), np.flatnonzero(distances[0] <= 500))
+
+    def test_cached_results_match(self):
+        index = self.index(self.centroids.zips[:50])
+        first = index.nearest(self.centroids.lat, self.centroids.lon, k=2)
+        second = index.nearest(self.centroids.lat, self.centroids.lon, k=2)
+        uncached = index.nearest(self.centroids.lat, self.centroids.lon, k=2, use_cache=False)
+        for a, b, c in zip(first, second, uncached):
+            np.testing.assert_array_equal(a, b)
+            np.testing.assert_array_equal(a, c)
+
+    def test_is_24_hour(self):
+        stores = pd.DataFrame({"startMin": [0, 0, 420], "endMin": [1440, 1380, 1440]})
+        np.testing.assert_array_equal(is_24_hour(stores), [True, False, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+from os import path, stat, utime
+from tempfile import TemporaryDirectory
+from unittest import mock
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import store_data
+from store_data import load_stores, to_minutes
+
+
+CSV = """postalCode,address,city,state,startHr,endHr,storeNumber
+72712,406 S Walton Blvd,Bentonville,AR,07,23:00,1
+76645,401 Coke Ave,Hillsboro,TX,00:00,24:00,211
+75001,1 Main St,Addison,TX,06:30,01:00,5
+"""
+
+
+class TestLoadStores(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.csv_path = path.join(self.directory.name, "stores.csv")
+        self.write(CSV)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text: str) -> None:
+        with open(self.csv_path, "w") as filehandle:
+            filehandle.write(text)
+
+    def load(self, **kwargs) -> tuple[pd.DataFrame, mock.Mock, mock.Mock]:
+        """The frame, plus spies on building the columns and hashing the CSV."""
+        with mock.patch.object(store_data, "build_columns", wraps=store_data.build_columns) as build, \
+                mock.patch.object(store_data, "file_digest", wraps=store_data.file_digest) as digest:
+            return load_stores(self.csv_path, **kwargs), build, digest
+
+    def test_types_and_columns(self):
+        stores, _, _ = self.load()
+        self.assertEqual(list(stores.columns), store_data.COLUMNS)
+        self.assertIsInstance(stores["state"].dtype, pd.CategoricalDtype)
+        self.assertEqual(stores["postalCode"].dtype, np.int32)
+        self.assertEqual(stores["startMin"].tolist(), [420, 0, 390])
+        self.assertEqual(stores["endMin"].tolist(), [1380, 1440, 60])
+
+        stores, _, _ = self.load(columns=["state", "endMin"])
+        self.assertEqual(list(stores.columns), ["state", "endMin"])
+        self.assertEqual(stores["state"].tolist(), ["AR", "TX", "TX"])
+
+        with self.assertRaises(ValueError):
+            load_stores(self.csv_path, columns=["state", "latitude"])
+
+    def test_untouched_csv_is_not_read(self):
+        self.load()
+        _, build, digest = self.load(columns=["state"])
+        build.assert_not_called()
+        digest.assert_not_called()
+
+    def test_touched_but_identical_csv_is_only_hashed(self):
+        self.load(columns=["city"])
+        source = stat(self.csv_path)
+        utime(self.csv_path, ns=(source.st_atime_ns, source.st_mtime_ns + 10 ** 9))
+
+        stores, build, digest = self.load(columns=["city"])
+        build.assert_not_called()
+        digest.assert_called_once()
+        self.assertEqual(stores["city"].tolist(), ["Bentonville", "Hillsboro", "Addison"])
+
+        # the cache took the new mtime, every column still in it
+        _, _, digest = self.load()
+        digest.assert_not_called()
+
+    def test_changed_csv_rebuilds(self):
+        self.load()
+        source = stat(self.csv_path)
+        self.write(CSV.replace("Hillsboro,TX", "Hillsboro,OK"))  # same size
+        utime(self.csv_path, ns=(source.st_atime_ns, source.st_mtime_ns + 10 ** 9))  # whatever the clock resolution
+
+        stores, build, _ = self.load(columns=["state"])
+        build.assert_called_once()
+        self.assertEqual(stores["state"].tolist(), ["AR", "OK", "TX"])
+
+
+class TestToMinutes(unittest.TestCase):
+    def test_mixed_formats(self):
+        times = pd.Series(["07", "06:30", "24:00"])
+        np.testing.assert_array_equal(to_minutes(times), [420, 390, 1440])
+        np.testing.assert_array_equal(to_minutes(pd.Series(["07", "23"])), [420, 1380])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest import mock
+from os import path
+import sys
+import unittest
+
+import requests
+
+import walmart_scrapper
+from walmart_scrapper import FAILED, FOUND, MISSING, UNPARSED, CrawlJournal, crawl, crawl_store, retry_failed
+
+# the repo root's, for `python -m unittest` in this folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import http_cache  # noqa: E402
+
+
+class FakeSite:
+    """``get_store_info`` for a site where 2 is missing, 3 can't be parsed and 4 is down ``outages`` times."""
+
+    def __init__(self, outages: int = 1) -> None:
+        self.outages = outages
+        self.requested = []
+
+    def __call__(self, store_number: int):
+        self.requested.append(store_number)
+        if store_number == 2:
+            return None
+        if store_number == 3:
+            return 1
+        if store_number == 4 and self.outages:
+            self.outages -= 1
+            raise requests.ConnectionError("down")
+        return {"storeNumber": store_number}
+
+
+class TestCrawl(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.location = path.join(self.directory.name, "crawl.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def crawl(self, site: FakeSite, total_stores: int = 10, max_iter: int = 6) -> CrawlJournal:
+        with mock.patch.object(walmart_scrapper, "get_store_info", site):
+            return crawl(CrawlJournal(self.location), total_stores, max_iter)
+
+    def test_restart_skips_settled_stores(self):
+        first = FakeSite()
+        journal = self.crawl(first)
+        self.assertEqual(first.requested, [1, 2, 3, 4, 5, 6])
+        self.assertEqual([journal.status(i) for i in range(1, 7)], [FOUND, MISSING, UNPARSED, FAILED, FOUND, FOUND])
+
+        # found and missing stores are settled; unparsed and failed ones are asked for again
+        again = FakeSite()
+        journal = self.crawl(again)
+        self.assertEqual(again.requested, [3, 4])
+        self.assertEqual(journal.status(4), FAILED)
+
+        later = FakeSite(outages=0)
+        with mock.patch.object(walmart_scrapper, "get_store_info", later):
+            journal = retry_failed(CrawlJournal(self.location))
+        self.assertEqual(later.requested, [3, 4])
+        self.assertEqual(journal.status(4), FOUND)
+        self.assertEqual([record["storeNumber"] for record in journal.found()], [1, 4, 5, 6])
+
+    def test_stops_after_enough_stores(self):
+        site = FakeSite()
+        self.crawl(site, total_stores=2)
+        self.assertEqual(site.requested, [1, 2, 3])  # 1 found, 3 unparsed
+
+    def test_truncated_last_line_is_skipped(self):
+        journal = self.crawl(FakeSite(outages=0))
+        with open(self.location, "a") as filehandle:
+            filehandle.write('{"storeNumber": 7, "status": "found", "data": {"storeNumber": 7}')
+
+        journal = CrawlJournal(self.location)
+        self.assertEqual(sorted(journal.records), [1, 2, 3, 4, 5, 6])
+
+        # a record written after the cut-off line still reads back
+        journal.record(7, MISSING)
+        self.assertEqual(CrawlJournal(self.location).status(7), MISSING)
+
+
+class TestGetStoreInfo(unittest.TestCase):
+    def status_of(self, status_code: int, text: str = "") -> str:
+        response = SimpleNamespace(status_code=status_code, text=text)
+        with TemporaryDirectory() as directory, mock.patch.object(http_cache, "get", return_value=response):
+            return crawl_store(CrawlJournal(path.join(directory, "crawl.jsonl")), 1)
+
+    def test_statuses(self):
+        page = '{"address":{"postalCode":"72712","state":"AR"},"dailyHours":{"startHr":"06:00","endHr":"23:00"}}'
+        self.assertEqual(self.status_of(200, page), FOUND)
+        self.assertEqual(self.status_of(200, "<html></html>"), UNPARSED)
+        self.assertEqual(self.status_of(404), MISSING)
+        for status_code in (429, 500, 503):
+            self.assertEqual(self.status_of(status_code), FAILED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
-from typing import Union
-from json import loads
-from os import stat
+from typing import Iterable, Iterator, Optional, Union
+from json import JSONDecodeError, JSONDecoder, dumps, loads
+from os import path
+import re
 
 import requests
 import pandas as pd
@@ -10,6 +11,16 @@ CURR_STORES = 3568  # Total number of stores
 MAX_ITER = 8862  # Max number of store number to go up to
 BASE_URL = "https://www.walmart.com/store"
 SAVE_NAME = "walmart_data.csv"
+JOURNAL_NAME = "walmart_crawl.jsonl"
+
+
+# Outcomes recorded in the crawl journal
+FOUND = "found"  # store page parsed, data attached
+MISSING = "missing"  # no store with that number
+UNPARSED = "unparsed"  # store exists but the page could not be parsed
+FAILED = "failed"  # request blew up, worth retrying
+
+DONE_STATUSES = {FOUND, MISSING}
 
 
 # Some timed out, so I just got them manually
@@ -37,13 +48,90 @@ MISSING_POINTS = [
 
 DataFrame = pd.DataFrame
 StupidThing = Union[dict, int, None]
+Record = dict
+
+_DECODER = JSONDecoder()
+
+
+class CrawlJournal:
+    """Append-only JSONL log of every store number the crawl has looked at.
+
+    Each line is ``{"storeNumber": ..., "status": ..., "data": ...}``. Lines are
+    flushed as they are written, so a crawl that dies keeps everything it has
+    seen so far. When a store number shows up more than once (e.g. a retry of
+    a failed request) the last line wins.
+    """
+
+    def __init__(self, location: str = JOURNAL_NAME) -> None:
+        self.location = location
+        self.records: dict[int, Record] = dict(
+            (record["storeNumber"], record) for record in self._read()
+        )
+        self._end_partial_line()
+
+    def _read(self) -> Iterator[Record]:
+        if not path.exists(self.location):
+            return
+
+        with open(self.location, "r") as filehandle:
+            for line in filehandle:
+                # a crash mid-write can leave half a line at the end
+                try:
+                    record = loads(line)
+                except JSONDecodeError:
+                    continue
+                yield record
+
+    def _end_partial_line(self) -> None:
+        # otherwise the next record would be appended onto the cut-off one and lost with it
+        if not path.exists(self.location) or path.getsize(self.location) == 0:
+            return
+        with open(self.location, "rb+") as filehandle:
+            filehandle.seek(-1, 2)
+            if filehandle.read(1) != b"\n":
+                filehandle.write(b"\n")
+
+    def record(self, store_number: int, status: str, data: Optional[dict] = None) -> None:
+        record = {"storeNumber": store_number, "status": status, "data": data}
+        with open(self.location, "a") as filehandle:
+            filehandle.write(dumps(record) + "\n")
+        self.records[store_number] = record
+
+    def is_done(self, store_number: int) -> bool:
+        record = self.records.get(store_number)
+        return record is not None and record["status"] in DONE_STATUSES
+
+    def status(self, store_number: int) -> Optional[str]:
+        record = self.records.get(store_number)
+        return None if record is None else record["status"]
 
+    def found(self) -> list[dict]:
+        records = sorted(self.records.values(), key=lambda x: x["storeNumber"])
+        return [record["data"] for record in records if record["status"] == FOUND]
 
-def main() -> None:
-    data = get_walmart_store_data(CURR_STORES, MAX_ITER)
-    data.drop(['country', 'streetAddress'], axis=1, inplace=True)
-    data = data.append(MISSING_POINTS, ignore_index=True)
-    data.to_csv(SAVE_NAME)
+    def failed(self) -> list[int]:
+        return sorted(
+            store_number for store_number, record in self.records.items()
+            if record["status"] not in DONE_STATUSES
+        )
+
+
+def main(journal_name: str = JOURNAL_NAME, save_name: str = SAVE_NAME) -> None:
+    journal = CrawlJournal(journal_name)
+    crawl(journal, CURR_STORES, MAX_ITER)
+    materialize(journal, save_name)
+
+
+def materialize(journal: CrawlJournal, save_name: str = SAVE_NAME) -> DataFrame:
+    data = pd.DataFrame(journal.found())
+    data.drop(['country', 'streetAddress'], axis=1, inplace=True, errors='ignore')
+
+    known = set(data["storeNumber"]) if "storeNumber" in data else set()
+    extra = [point for point in MISSING_POINTS if point["storeNumber"] not in known]
+    data = pd.concat([data, pd.DataFrame(extra)], ignore_index=True)
+
+    data.to_csv(save_name, index=False)
+    return data
 
 
 def get_info(text: str, key: str) -> dict:
@@ -56,50 +144,107 @@ def get_info(text: str, key: str) -> dict:
     return loads(text[start+n:(start + i + 1)])
 
 
-def get_store_info(store_number: int) -> StupidThing:
-    url = f"{BASE_URL}/{store_number}"
-    response = requests.get(url)
-    
-    if response.status_code != 200:
+def get_infos(text: str, keys: Iterable[str]) -> dict[str, dict]:
+    # One regex pass finds the first `"key":{` for every key, and the C JSON
+    # decoder reads each object from there, so nested objects come out whole.
+    keys = list(keys)
+    pattern = re.compile('"(' + '|'.join(map(re.escape, keys)) + ')":(?={)')
+
+    output = {}
+    for match in pattern.finditer(text):
+        key = match.group(1)
+        if key in output:
+            continue
+
+        try:
+            output[key], _ = _DECODER.raw_decode(text, match.end())
+        except JSONDecodeError:
+            continue
+
+        if len(output) == len(keys):
+            break
+    return output
+
+
+def parse_store_page(text: str, store_number: int) -> Optional[dict]:
+    infos = get_infos(text, ["address", "dailyHours"])
+    if len(infos) != 2:
         return None
-    
-    if not all(map(lambda x: x in response.text, ["address", "dailyHours"])):
-        with open('could_not_parse.txt', "a+") as file:
-            init_string = f"{store_number}"
-            if stat('could_not_parse.txt').st_size != 0:
-                init_string = "," + init_string
-            file.write(init_string)
-        return 1
-    
-    output = get_info(response.text, "address")
-    hour_info = get_info(response.text, "dailyHours")
-      
+
+    output, hour_info = infos["address"], infos["dailyHours"]
+
     if "startHr" not in hour_info or "endHr" not in hour_info:
-        with open('could_not_parse.txt', "a+") as file:
-            init_string = f"{store_number}"
-            if stat('could_not_parse.txt').st_size != 0:
-                init_string = "," + init_string
-            file.write(init_string)
-        return 1
-    
+        return None
+
     output["startHr"] = hour_info["startHr"]
     output["endHr"] = hour_info["endHr"]
     output["storeNumber"] = store_number
-    
+
     return output
-    
 
-def get_walmart_store_data(total_stores: int, max_iter: int = 10000) -> DataFrame:
+
+def get_store_info(store_number: int) -> StupidThing:
+    import http_cache  # repo root; only fetching needs it, parsing doesn't
+
+    url = f"{BASE_URL}/{store_number}"
+    response = http_cache.get(url)
+
+    if response.status_code == 404:
+        return None
+    # rate limits and server errors say nothing about the store: fail, so it's retried
+    if response.status_code != 200:
+        raise requests.HTTPError(f"{response.status_code} for {url}")
+
+    output = parse_store_page(response.text, store_number)
+    return 1 if output is None else output
+
+
+def crawl_store(journal: CrawlJournal, store_number: int) -> str:
+    import http_cache
+
+    try:
+        store_info = get_store_info(store_number)
+    except (requests.RequestException, http_cache.CacheMiss):
+        journal.record(store_number, FAILED)
+        return FAILED
+
+    if store_info is None:
+        journal.record(store_number, MISSING)
+        return MISSING
+
+    if isinstance(store_info, dict):
+        journal.record(store_number, FOUND, store_info)
+        return FOUND
+
+    journal.record(store_number, UNPARSED)
+    return UNPARSED
+
+
+def crawl(journal: CrawlJournal, total_stores: int, max_iter: int = 10000) -> CrawlJournal:
+    # Stores already settled in the journal are counted but never re-fetched,
+    # so a restarted crawl only spends requests on new and previously failed numbers
     n_stores, store_num = 0, 1
-    all_values = []
     while n_stores < total_stores and store_num <= max_iter:
-        store_info = get_store_info(store_num)
-        if store_info is not None:
-            if isinstance(store_info, dict):
-                all_values.append(store_info)
+        status = journal.status(store_num)
+        if not journal.is_done(store_num):
+            status = crawl_store(journal, store_num)
+
+        if status in (FOUND, UNPARSED):
             n_stores += 1
         store_num += 1
-    return pd.DataFrame(all_values)
+    return journal
+
+
+def retry_failed(journal: CrawlJournal) -> CrawlJournal:
+    for store_num in journal.failed():
+        crawl_store(journal, store_num)
+    return journal
+
+
+def get_walmart_store_data(total_stores: int, max_iter: int = 10000,
+                           journal_name: str = JOURNAL_NAME) -> DataFrame:
+    journal = crawl(CrawlJournal(journal_name), total_stores, max_iter)
+    return pd.DataFrame(journal.found())
 
 
 if __name__ == '__main__':
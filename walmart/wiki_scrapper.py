@@ -1,7 +1,5 @@
 from json import dump, load
 
-import requests
-
 from bs4 import BeautifulSoup
 
 
@@ -13,8 +11,10 @@ DataPoints = dict[str, float]
 Soup = BeautifulSoup
 
 
-def main() -> None:
-    page = requests.get(URL)
+def main(save_location: str = SAVE_LOCATION) -> None:
+    import http_cache  # repo root; only fetching needs it, loading doesn't
+
+    page = http_cache.get(URL)
     soup = BeautifulSoup(page.content, "html.parser")
     table = soup.find("table")
 
@@ -24,7 +24,7 @@ def main() -> None:
         data_rows
     ))
 
-    write(output, SAVE_LOCATION)
+    write(output, save_location)
 
 
 def process_row(row: Soup, year_index: int) -> tuple[str, float]:
@@ -1,46 +1,94 @@
 from string import ascii_lowercase
-from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
 from json import dump, load
-
-import requests
-
-from bs4 import BeautifulSoup
+from typing import Optional
 
 
 BASE_URL = "https://scrabble.merriam.com/words/start-with/"
 DESTINATION = "scrabble_words.json"
+N_THREADS = 8
+
 
+def main(offline: bool = False) -> None:
+    import http_cache  # repo root; only fetching needs it, loading doesn't
 
-def main() -> None:
     output = []
+    cache = http_cache.HttpCache(offline=True) if offline else http_cache.default_cache()
 
-    with Pool(5) as p:
-        results = p.map(get_words_starting_with, ascii_lowercase)
+    # the work is waiting on the network, so threads are plenty
+    with ThreadPoolExecutor(N_THREADS) as executor:
+        results = executor.map(
+            lambda letter: get_words_starting_with(letter, cache),
+            ascii_lowercase
+        )
         for words in results:
             output.extend(words)
 
-        write(output, DESTINATION)
+    write(output, DESTINATION)
 
 
-def get_words_starting_with(letter: str) -> list[str]:
-    output = []
+def get_words_starting_with(letter: str, cache: Optional["http_cache.HttpCache"] = None) -> list[str]:
+    import http_cache
+
     url = f"{BASE_URL}/{letter}"
-    page = requests.get(url)
-    soup = BeautifulSoup(page.content, "html.parser")
-    relevant_divs = soup.find_all("div", class_="wres_slideable")
-    for div in relevant_divs:
-        list_elements = div.find_all("li")
-        words = list(
-            filter(
-                lambda w: 2 <= len(w) <= 7,
-                map(
-                    lambda li: li.text.strip(),
-                    list_elements
-                )
-            )
-        )
-        output.extend(words)
-    return output
+    page = (cache or http_cache.default_cache()).get(url)
+    page.raise_for_status()
+    return extract_words(page.content)
+
+
+class WordListParser(HTMLParser):
+    """Collect the text of every ``li`` inside a ``div.wres_slideable``.
+
+    Streams through the page once instead of building a full parse tree.
+    An item whose ``</li>`` is left out (valid HTML) ends at the next ``li``,
+    at the end of its list, or at the end of the div.
+    """
+
+    def __init__(self) -> None:
+        super(WordListParser, self).__init__()
+        self.words = []
+        self._div_depth = 0  # open divs since entering a wres_slideable, 0 = outside
+        self._li_text = None
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag != "div" and tag != "li":
+            return
+
+        if tag == "li":
+            self._close_item()
+            if self._div_depth:
+                self._li_text = []
+            return
+
+        if self._div_depth:
+            self._div_depth += 1
+        elif "wres_slideable" in (dict(attrs).get("class") or "").split():
+            self._div_depth = 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in ("li", "ul", "ol"):
+            self._close_item()
+
+        elif tag == "div" and self._div_depth:
+            self._close_item()
+            self._div_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._li_text is not None:
+            self._li_text.append(data)
+
+    def _close_item(self) -> None:
+        if self._li_text is not None:
+            self.words.append("".join(self._li_text).strip())
+            self._li_text = None
+
+
+def extract_words(page: bytes) -> list[str]:
+    parser = WordListParser()
+    parser.feed(page.decode("utf-8", errors="replace"))
+    parser.close()
+    return list(filter(lambda w: 2 <= len(w) <= 7, parser.words))
 
 
 def write(values: list[str], path: str) -> None:
@@ -54,4 +102,5 @@ def load_words() -> list[str]:
 
 
 if __name__ == '__main__':
-    main()
+    from sys import argv
+    main(offline="--offline" in argv)
@@ -0,0 +1,71 @@
+import unittest
+
+from bs4 import BeautifulSoup
+
+from scrabble_scrapper import extract_words
+
+
+# laid out like a https://scrabble.merriam.com/words/start-with/ page: word lists in div.wres_slideable
+PAGE = b"""<!DOCTYPE html>
+<html lang="en">
+<head><title>Words that start with Q | Scrabble Word Finder</title></head>
+<body>
+<div class="wres_container">
+  <h2>Words that start with <strong>q</strong></h2>
+  <div class="wres_slideable">
+    <div class="wres_sh">2 Letter Words</div>
+    <ul class="wres_ul">
+      <li><a href="/finder/qi">qi</a></li>
+    </ul>
+    <div class="wres_sh">3 Letter Words</div>
+    <ul class="wres_ul">
+      <li><a href="/finder/qat">qat</a></li>
+      <li><a href="/finder/qis">qis</a></li>
+      <li><a href="/finder/qua">qua</a></li>
+    </ul>
+  </div>
+  <div class="wres_slideable wres_more">
+    <div class="wres_sh">7 Letter Words</div>
+    <ul class="wres_ul">
+      <li><a href="/finder/quizzed">quizzed</a></li>
+      <li><a href="/finder/qu&eacute;b&eacute;c">qu&eacute;bec</a></li>
+      <li>
+        <a href="/finder/quartz">quartz</a>
+      </li>
+    </ul>
+    <div class="wres_sh">8 Letter Words</div>
+    <ul class="wres_ul">
+      <li><a href="/finder/quadrant">quadrant</a></li>
+    </ul>
+  </div>
+  <div class="related"><ul><li><a href="/finder/queen">queen</a></li></ul></div>
+</div>
+</body>
+</html>
+"""
+
+
+def soup_words(page: bytes) -> list[str]:
+    """What get_words_starting_with extracted with BeautifulSoup."""
+    soup = BeautifulSoup(page, "html.parser")
+    return [
+        word
+        for div in soup.find_all("div", class_="wres_slideable")
+        for word in map(lambda li: li.text.strip(), div.find_all("li"))
+        if 2 <= len(word) <= 7
+    ]
+
+
+class TestExtractWords(unittest.TestCase):
+    def test_matches_beautiful_soup(self):
+        words = extract_words(PAGE)
+        self.assertEqual(words, soup_words(PAGE))
+        self.assertEqual(words, ["qi", "qat", "qis", "qua", "quizzed", "québec", "quartz"])
+
+    def test_omitted_end_tags(self):
+        page = b'<div class="wres_slideable"><ul><li>dog<li>emu</ul><ol><li>cat</div><li>zzz'
+        self.assertEqual(extract_words(page), ["dog", "emu", "cat"])
+
+
+if __name__ == '__main__':
+    unittest.main()
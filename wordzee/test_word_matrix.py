@@ -0,0 +1,62 @@
+import random
+import unittest
+
+import numpy as np
+
+from word_matrix import LETTERS, WordMatrix
+from wordzee_search import GameAnalyzer
+
+
+WORDS = [
+    "cat", "act", "zap", "quiz", "jazz", "oxen", "fox", "boxer", "quartz", "jukebox", "zephyrs",
+    "aa", "ab", "ox", "zzz", "muzjiks", "syzygy", "rhythms", "banana", "strengths", "it's",
+]
+
+
+def game_analyzer(words: list[str], letter_vals: dict) -> GameAnalyzer:
+    analyzer = GameAnalyzer(letter_vals)
+    for word in words:
+        analyzer.update(word)
+    return analyzer
+
+
+def describe(node) -> tuple:
+    return node.points, [(w.word, w.base, w.max_loc, w.points_at_max_loc) for w in node.words]
+
+
+class TestWordMatrix(unittest.TestCase):
+    matrix = WordMatrix(WORDS)
+
+    def assert_matches(self, valuations: list[dict]) -> None:
+        for letter_vals, rows in zip(valuations, self.matrix.best_words(valuations, batch_size=2)):
+            expected = game_analyzer(WORDS, letter_vals).row_analyzers
+            self.assertEqual(len(rows), len(expected))
+            for row, analyzer in zip(rows, expected):
+                self.assertEqual((row.row, row.length), (analyzer.row, analyzer.length))
+                self.assertEqual(describe(row.best), describe(analyzer.best), letter_vals)
+                self.assertEqual(describe(row.best_full), describe(analyzer.best_full), letter_vals)
+
+    def test_matches_game_analyzer(self):
+        rng = random.Random(0)
+        valuations = [dict((letter, rng.randint(1, 10)) for letter in LETTERS) for _ in range(7)]
+        # only some letters worth anything, so ties and zero-point words come up
+        valuations.append({"a": 1, "z": 10, "q": 10})
+        self.assert_matches(valuations)
+
+    def test_all_zero_valuation(self):
+        self.assert_matches([dict((letter, 0) for letter in LETTERS)])
+
+    def test_scores(self):
+        values = WordMatrix.value_matrix([dict((letter, k + 1) for k, letter in enumerate(LETTERS))])
+        base, bonus, bonus_bounded = self.matrix.scores(values)
+
+        value = lambda letter: ord(letter) - ord("a") + 1
+        jukebox = WORDS.index("jukebox")
+        self.assertEqual(base[0, jukebox], sum(map(value, "jukebox")))
+        self.assertEqual(bonus[0, jukebox], value("x"))
+        self.assertEqual(bonus_bounded[0, jukebox], value("u"))  # best of "jukeb"
+        np.testing.assert_array_equal(bonus_bounded[0, :3], [20, 20, 26])  # cat, act, zap
+
+
+if __name__ == '__main__':
+    unittest.main()
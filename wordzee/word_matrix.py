@@ -0,0 +1,118 @@
+from string import ascii_lowercase
+from typing import Iterator, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from wordzee_search import LetterVals, Node, RowAnalyzer, Word, max_up_to
+
+
+LETTERS = ascii_lowercase
+ROW_LENGTHS = [3, 4, 5, 6, 7]
+BONUS_BOUND = 5  # rows 4 and 5 only take the bonus on the first five letters (see GameAnalyzer)
+PADDING = np.iinfo(np.int64).min // 2  # value of positions past the end of a word
+
+
+class WordMatrix:
+    """A dictionary precomputed for scoring under many letter valuations at once.
+
+    ``counts`` is a sparse word x letter matrix of how often each letter
+    appears, so ``counts @ values.T`` is every word's base score under every
+    valuation. ``positions[p]`` holds the letter index at position ``p`` of
+    every word, which gives the best bonus letter by indexing. Letters
+    outside ``LETTERS`` get index ``len(LETTERS)`` and are worth 0, as in
+    ``GameAnalyzer``; positions past the end of a word get the index after
+    that, worth ``PADDING``.
+    """
+
+    def __init__(self, words: list[str]) -> None:
+        self.words = list(words)
+        self.lengths = np.array([len(word) for word in self.words], dtype=np.int64)
+        other = len(LETTERS)  # letters a valuation can't give points to
+        index = dict((letter, k) for k, letter in enumerate(LETTERS))
+
+        rows, cols = [], []
+        self.positions = np.full((max(ROW_LENGTHS), len(self.words)), other + 1, dtype=np.int64)
+        for w, word in enumerate(self.words):
+            for p, letter in enumerate(word[:max(ROW_LENGTHS)]):
+                rows.append(w)
+                cols.append(index.get(letter, other))
+                self.positions[p, w] = cols[-1]
+
+        self.counts = sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.int64), (rows, cols)),
+            shape=(len(self.words), other + 1)
+        )
+
+    @staticmethod
+    def value_matrix(valuations: Union[list[LetterVals], np.ndarray]) -> np.ndarray:
+        """Valuations as rows over ``LETTERS``; an array is taken as already in that form."""
+        if isinstance(valuations, np.ndarray):
+            return valuations.astype(np.int64, copy=False).reshape(-1, len(LETTERS))
+        return np.array([[vals.get(letter, 0) for letter in LETTERS] for vals in valuations], dtype=np.int64)
+
+    def scores(self, values: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Base scores and best bonus letters, each ``(valuations, words)``.
+
+        Returns ``base``, ``bonus`` (best letter anywhere in the word) and
+        ``bonus_bounded`` (best letter in the first ``BONUS_BOUND``).
+        """
+        k = values.shape[0]
+        padded = np.empty((k, len(LETTERS) + 2), dtype=np.int64)
+        padded[:, :len(LETTERS)] = values
+        padded[:, len(LETTERS)] = 0
+        padded[:, len(LETTERS) + 1] = PADDING
+
+        base = np.asarray((self.counts @ padded[:, :len(LETTERS) + 1].T).T)
+
+        bonus = np.full((k, len(self.words)), PADDING, dtype=np.int64)
+        bonus_bounded = bonus
+        for p, letters in enumerate(self.positions):
+            np.maximum(bonus, padded[:, letters], out=bonus)
+            if p + 1 == BONUS_BOUND:
+                bonus_bounded = bonus.copy()
+
+        return base, bonus, bonus_bounded
+
+    def best_words(self, valuations: Union[list[LetterVals], np.ndarray],
+                   batch_size: int = 64) -> list[list[RowAnalyzer]]:
+        """What ``GameAnalyzer`` ends up with for every valuation: one ``RowAnalyzer`` per row.
+
+        Valuations are scored ``batch_size`` at a time, each batch with one
+        sparse matrix product, to bound memory.
+        """
+        values = self.value_matrix(valuations)
+        output = []
+        for start in range(0, len(values), batch_size):
+            batch = values[start:start + batch_size]
+            base, bonus, bonus_bounded = self.scores(batch)
+
+            for k in range(len(batch)):
+                output.append(list(self._rows(batch[k], base[k], bonus[k], bonus_bounded[k])))
+        return output
+
+    def _rows(self, values: np.ndarray, base: np.ndarray, bonus: np.ndarray,
+              bonus_bounded: np.ndarray) -> Iterator[RowAnalyzer]:
+        for row, length in enumerate(ROW_LENGTHS, start=1):
+            bounded = row in [4, 5]
+            # Word.points_with_bonus(2) adds the best letter once more
+            points = base + (bonus_bounded if bounded else bonus)
+
+            analyzer = RowAnalyzer(row, length)
+            analyzer.best = self._node(values, points, self.lengths <= length, bounded)
+            analyzer.best_full = self._node(values, points, self.lengths == length, bounded)
+            yield analyzer
+
+    def _node(self, values: np.ndarray, points: np.ndarray, eligible: np.ndarray, bounded: bool) -> Node:
+        best = max(0, int(points[eligible].max())) if eligible.any() else 0
+        node = Node(best)
+        for w in np.flatnonzero(eligible & (points == best)):
+            node.insert(self._word(values, self.words[w], bounded))
+        return node
+
+    def _word(self, values: np.ndarray, word: str, bounded: bool) -> Word:
+        vals = dict(zip(LETTERS, values.tolist()))
+        points = [vals.get(letter, 0) for letter in word]
+        bound = min(BONUS_BOUND, len(word)) if bounded else len(word)
+        max_index, max_value = max_up_to(points, bound)
+        return Word(word, sum(points), max_index, max_value)